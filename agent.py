@@ -6,63 +6,455 @@ utilizando o Google Agent Development Kit (ADK).
 
 import os
 import json
+import asyncio
+import logging
 import datetime
+import functools
+import threading
+import time
+import uuid
+import concurrent.futures
 import pytz
 from typing import Optional, Dict, List, Any
 from google import genai
 
+# Execução direta (python agent.py): os módulos irmãos usam importações relativas,
+# então o módulo é recarregado como parte do pacote e o modo interativo roda a partir dele
+if __name__ == "__main__" and not __package__:
+    import importlib
+    import sys
+    _package_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.dirname(_package_dir))
+    importlib.import_module(f"{os.path.basename(_package_dir)}.agent").main()
+    sys.exit(0)
+
 # Importações do Google ADK
 from google.adk.agents import Agent
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.tools import FunctionTool
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.events import Event
 from google.genai import types  # Para criar conteúdos (Content e Part)
 # Importações para autenticação e APIs do Google
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
 import gspread
 from googleapiclient.errors import HttpError
 
+from .calendar_discovery import build_calendar_service, discovery_stats
+from .calendar_sync import CalendarEventStore, CalendarSync
+from .client_pool import ClientPool, adapter_stats, mount_pooled_adapter
+from .context_compaction import ContextCompactor
+from .freebusy_cache import FreeBusyCache
+from . import occupancy, slots
+from .history_index import HistoryIndex, PLATE_COLUMN_HEADER
+from .history_sync import HistorySync
+from .http_transport import HttpxAdapter, HttpxHttplib2, TransportStats, create_client
+from .intent_router import PlateIntentRouter
+from .journal import WriteJournal
+from .rate_limit import TokenBucket
+from .retry import RetryPolicy, is_retryable, is_transient
+from .session_store import open_session_service
+from .worksheet_cache import WorksheetCache
+from .write_queue import SheetWriteQueue
+
+logger = logging.getLogger(__name__)
+
 # Constantes e configurações
 APP_NAME = "autoagenda_agent"
-USER_ID = "user1234"
-SESSION_ID = "session1234"
+USER_ID = "user1234"  # Cliente do modo interativo (console)
 MODEL_ID = "gemini-2.0-flash"  # Usando o modelo mais recente do Gemini
 TIMEZONE = 'America/Sao_Paulo'  # Fuso horário para operações de data/hora
+WORK_START_TIME = datetime.time(9, 0)  # Início do horário de trabalho (9:00)
+WORK_END_TIME = datetime.time(18, 0)   # Fim do horário de trabalho (18:00)
+MAX_SEARCH_DAYS = 31  # Maior intervalo (em dias) consultado em uma única busca de horários
+CALENDAR_BATCH_SIZE = 50  # Número máximo de eventos por requisição em lote ao Calendar (limite da API: 50)
+
+# Calendários dos boxes/elevadores da oficina (um calendário por box), separados por vírgula.
+# Um horário está disponível quando ao menos um box está livre durante todo o serviço.
+CALENDAR_IDS = [
+    calendar_id.strip()
+    for calendar_id in os.environ.get('CALENDAR_IDS', 'primary').split(',')
+    if calendar_id.strip()
+] or ['primary']
+# Granularidade (em minutos) dos bitmaps de ocupação; os horários oferecidos começam em múltiplos dela
+SLOT_GRANULARITY_MINUTES = int(os.environ.get('SLOT_GRANULARITY_MINUTES', '15'))
+# Número máximo de chamadas bloqueantes (Sheets/Calendar) executadas ao mesmo tempo pelas ferramentas assíncronas
+TOOL_EXECUTOR_WORKERS = int(os.environ.get('TOOL_EXECUTOR_WORKERS', '8'))
 
 # Configuração de autenticação
 SERVICE_ACCOUNT_FILE_PATH = os.environ.get('SERVICE_ACCOUNT_FILE_PATH', '/path/to/service-account-key.json')
 SHEET_ID = os.environ.get('GOOGLE_SHEET_ID', '')
 SCOPES = ['https://www.googleapis.com/auth/calendar', 'https://www.googleapis.com/auth/spreadsheets']
 
-# Inicialização das credenciais e serviços
+# Tempo (em segundos) até o índice de histórico em memória ser recarregado da planilha
+HISTORY_INDEX_TTL_SECONDS = float(os.environ.get('HISTORY_INDEX_TTL_SECONDS', '300'))
+# Intervalo máximo (em segundos) entre recargas completas da planilha de histórico
+HISTORY_FULL_RELOAD_SECONDS = float(os.environ.get('HISTORY_FULL_RELOAD_SECONDS', '3600'))
+# Tempo (em segundos) que o handle da worksheet aberta é reaproveitado entre chamadas
+WORKSHEET_CACHE_TTL_SECONDS = float(os.environ.get('WORKSHEET_CACHE_TTL_SECONDS', '600'))
+# Janela (em segundos) para agrupar novas linhas antes de gravá-las em lote na planilha
+SHEET_WRITE_FLUSH_SECONDS = float(os.environ.get('SHEET_WRITE_FLUSH_SECONDS', '2'))
+# Número máximo de linhas gravadas por chamada append_rows
+SHEET_WRITE_BATCH_SIZE = int(os.environ.get('SHEET_WRITE_BATCH_SIZE', '50'))
+# Espera máxima (em segundos) entre novas tentativas de gravação enquanto a planilha estiver falhando
+SHEET_WRITE_MAX_BACKOFF_SECONDS = float(os.environ.get('SHEET_WRITE_MAX_BACKOFF_SECONDS', '300'))
+# Diretório gravável dos dados locais (journal, sessões); fora do pacote, que pode estar em um local somente leitura
+DATA_DIR = os.environ.get(
+    'AUTOAGENDA_DATA_DIR',
+    os.path.join(os.environ.get('XDG_STATE_HOME') or os.path.expanduser('~/.local/state'), 'autoagenda')
+)
+# Arquivo do journal local (WAL) das linhas ainda não gravadas na planilha (criado no primeiro uso)
+SHEET_JOURNAL_PATH = os.environ.get('SHEET_JOURNAL_PATH', os.path.join(DATA_DIR, 'sheet_journal.jsonl'))
+# Tempo (em segundos) que os horários ocupados de um dia ficam em cache (só nas consultas; a reserva consulta a agenda)
+FREEBUSY_CACHE_TTL_SECONDS = float(os.environ.get('FREEBUSY_CACHE_TTL_SECONDS', '60'))
+# Responde à disponibilidade a partir de um espelho local da agenda sincronizado via syncToken
+CALENDAR_SYNC_ENABLED = os.environ.get('CALENDAR_SYNC_ENABLED', 'FALSE').upper() == 'TRUE'
+# Idade máxima (em segundos) do espelho local antes de uma sincronização incremental
+CALENDAR_SYNC_MAX_STALENESS_SECONDS = float(os.environ.get('CALENDAR_SYNC_MAX_STALENESS_SECONDS', '30'))
+# Banco SQLite onde as sessões (conversas) de cada cliente são gravadas (aberto na primeira conversa)
+SESSION_DB_PATH = os.environ.get('SESSION_DB_PATH', os.path.join(DATA_DIR, 'sessions.db'))
+# Número máximo de sessões mantidas em memória
+SESSION_CACHE_MAX_SESSIONS = int(os.environ.get('SESSION_CACHE_MAX_SESSIONS', '1000'))
+# Tempo (em segundos) sem atividade após o qual uma sessão sai da memória (continua gravada no banco)
+SESSION_IDLE_TTL_SECONDS = float(os.environ.get('SESSION_IDLE_TTL_SECONDS', '1800'))
+# Orçamento (tokens estimados) do histórico enviado ao modelo; acima dele o histórico é compactado
+CONTEXT_TOKEN_BUDGET = int(os.environ.get('CONTEXT_TOKEN_BUDGET', '8000'))
+# Tamanho máximo (caracteres) de um resultado de ferramenta de turnos anteriores após a compactação
+CONTEXT_TOOL_RESULT_MAX_CHARS = int(os.environ.get('CONTEXT_TOOL_RESULT_MAX_CHARS', '1500'))
+# Responde consultas de histórico por placa sem chamar o modelo (veja intent_router.py)
+INTENT_ROUTER_ENABLED = os.environ.get('INTENT_ROUTER_ENABLED', 'TRUE').upper() == 'TRUE'
+# Imprime a resposta do modelo à medida que ela é gerada (streaming SSE) no modo interativo
+STREAMING_ENABLED = os.environ.get('STREAMING_ENABLED', 'TRUE').upper() == 'TRUE'
+# Nível mínimo dos logs das bibliotecas (ADK, genai, clientes HTTP) exibidos no modo interativo
+LIBRARY_LOG_LEVEL = os.environ.get('LIBRARY_LOG_LEVEL', 'ERROR')
+# Número máximo de clientes do Calendar (cada um com a sua conexão) usados ao mesmo tempo
+CALENDAR_POOL_SIZE = int(os.environ.get('CALENDAR_POOL_SIZE', str(TOOL_EXECUTOR_WORKERS)))
+# Número máximo de conexões keep-alive do cliente do Sheets
+SHEETS_POOL_SIZE = int(os.environ.get('SHEETS_POOL_SIZE', str(TOOL_EXECUTOR_WORKERS)))
+# Transporte HTTP das APIs do Google: 'default' (httplib2/requests) ou 'httpx' (conexões longas, HTTP/2 se disponível)
+HTTP_TRANSPORT = os.environ.get('HTTP_TRANSPORT', 'default').lower()
+# Verificação TLS do transporte httpx: TRUE, FALSE ou o caminho de um CA (ex.: servidor de teste local)
+HTTPX_VERIFY = os.environ.get('HTTPX_VERIFY', 'TRUE')
+# Tentativas (incluindo a primeira) de uma chamada às APIs que falhou com cota excedida ou HTTP 500/503
+RETRY_MAX_ATTEMPTS = int(os.environ.get('RETRY_MAX_ATTEMPTS', '4'))
+# Espera máxima (em segundos) antes da primeira retentativa; dobra a cada nova tentativa (com jitter)
+RETRY_BASE_DELAY_SECONDS = float(os.environ.get('RETRY_BASE_DELAY_SECONDS', '0.2'))
+# Limite (em segundos) de cada espera entre tentativas
+RETRY_MAX_DELAY_SECONDS = float(os.environ.get('RETRY_MAX_DELAY_SECONDS', '2'))
+# Orçamento (em segundos) de retentativas de uma execução de ferramenta
+RETRY_DEADLINE_SECONDS = float(os.environ.get('RETRY_DEADLINE_SECONDS', '10'))
+# Requisições por minuto liberadas para a API do Sheets, logo abaixo da cota (padrão do Google: 60 por minuto por usuário); 0 desativa o limite
+SHEETS_REQUESTS_PER_MINUTE = float(os.environ.get('SHEETS_REQUESTS_PER_MINUTE', '55'))
+# Requisições por minuto liberadas para a API do Calendar; 0 desativa o limite
+CALENDAR_REQUESTS_PER_MINUTE = float(os.environ.get('CALENDAR_REQUESTS_PER_MINUTE', '500'))
+# Espera máxima (em segundos) pela vez de uma requisição no limitador; acima disso ela é descartada
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.environ.get('RATE_LIMIT_MAX_WAIT_SECONDS', '5'))
+
+# Serviços do Google criados sob demanda: importar o módulo não carrega credenciais
+# nem monta o cliente do Calendar. Use warmup() para pagar esse custo antecipadamente.
+_NOT_INITIALIZED = object()
+_services_lock = threading.Lock()
+_credentials = _NOT_INITIALIZED
+_calendar_pool = _NOT_INITIALIZED
+_gc = _NOT_INITIALIZED
+_sheets_adapter = None
+_httpx_client = None
+_transport_lock = threading.Lock()
+# Uso do transporte httpx (requisições, conexões abertas e reaproveitadas, versões HTTP)
+transport_stats = TransportStats()
+
+def _get_httpx_client():
+    """
+    Retorna o cliente httpx compartilhado pelo Calendar e pelo Sheets, criando-o na primeira chamada.
+    """
+    global _httpx_client
+    with _transport_lock:
+        if _httpx_client is None:
+            _httpx_client = _create_httpx_client()
+        return _httpx_client
+
+def _create_httpx_client(**kwargs):
+    """
+    Cria um cliente httpx com as opções de HTTPX_VERIFY e dos pools (``kwargs`` extras, ex.: ``cert=``).
+    """
+    verify = HTTPX_VERIFY
+    if verify.upper() in ('TRUE', 'FALSE'):
+        verify = verify.upper() == 'TRUE'
+    return create_client(
+        max_connections=max(CALENDAR_POOL_SIZE, SHEETS_POOL_SIZE),
+        verify=verify,
+        **kwargs
+    )
+
+def _build_pooled_calendar_service(creds):
+    """
+    Cria um cliente do Calendar para o pool, com o transporte configurado em HTTP_TRANSPORT.
+    """
+    if HTTP_TRANSPORT == 'httpx':
+        # Os clientes do pool compartilham as conexões (multiplexadas em HTTP/2) do cliente httpx
+        return build_calendar_service(http=AuthorizedHttp(creds, http=HttpxHttplib2(
+            _get_httpx_client(), transport_stats, client_factory=_create_httpx_client
+        )))
+    # Cada cliente tem o seu próprio httplib2.Http (e a sua conexão keep-alive)
+    return build_calendar_service(creds)
+
+def _get_credentials():
+    """
+    Carrega (uma única vez) as credenciais do Service Account.
+    
+    Returns:
+        Credentials: Credenciais do Service Account ou None em caso de erro.
+    """
+    global _credentials
+    with _services_lock:
+        if _credentials is _NOT_INITIALIZED:
+            try:
+                # Autenticação usando o arquivo de credenciais do Service Account
+                _credentials = service_account.Credentials.from_service_account_file(
+                    SERVICE_ACCOUNT_FILE_PATH,
+                    scopes=SCOPES
+                )
+            except Exception as e:
+                print(f"Erro ao inicializar serviços: {e}")
+                _credentials = None
+        return _credentials
+
+def get_calendar_pool():
+    """
+    Retorna o pool de clientes do Google Calendar, criando-o (com um primeiro cliente) na primeira chamada.
+    
+    O cliente do Calendar não é thread-safe: cada chamada à API deve usar um
+    cliente emprestado com ``get_calendar_pool().lease()``.
+    
+    Returns:
+        ClientPool: Pool de serviços do Google Calendar ou None em caso de erro.
+    """
+    global _calendar_pool
+    if _calendar_pool is _NOT_INITIALIZED:
+        creds = _get_credentials()
+        with _services_lock:
+            if _calendar_pool is _NOT_INITIALIZED:
+                try:
+                    if creds:
+                        # Documento de discovery local e já interpretado: nenhuma requisição de rede
+                        pool = ClientPool(lambda: _build_pooled_calendar_service(creds), max_size=CALENDAR_POOL_SIZE)
+                        with pool.lease():
+                            pass
+                        _calendar_pool = pool
+                    else:
+                        _calendar_pool = None
+                except Exception as e:
+                    print(f"Erro ao inicializar o serviço do Google Calendar: {e}")
+                    _calendar_pool = None
+    return _calendar_pool
+
+def get_sheets_client():
+    """
+    Retorna o cliente gspread para o Google Sheets, criando-o na primeira chamada.
+    
+    Na criação do cliente, as linhas pendentes no journal local são reenviadas.
+    
+    Returns:
+        gspread.Client: Cliente do Google Sheets ou None em caso de erro.
+    """
+    global _gc, _sheets_adapter
+    created = False
+    if _gc is _NOT_INITIALIZED:
+        creds = _get_credentials()
+        with _services_lock:
+            if _gc is _NOT_INITIALIZED:
+                try:
+                    _gc = gspread.authorize(creds) if creds else None
+                    if _gc and HTTP_TRANSPORT == 'httpx':
+                        _gc.http_client.session.mount("https://", HttpxAdapter(_get_httpx_client(), transport_stats))
+                    elif _gc:
+                        # A sessão requests do gspread é compartilhada pelas threads das ferramentas
+                        # e pela fila de gravação: o pool de conexões acompanha essa concorrência
+                        _sheets_adapter = mount_pooled_adapter(_gc.http_client.session, SHEETS_POOL_SIZE)
+                except Exception as e:
+                    print(f"Erro ao inicializar o cliente do Google Sheets: {e}")
+                    _gc = None
+                created = True
+    if created and _gc and SHEET_ID:
+        # Reenvia as linhas registradas no journal que não chegaram à planilha antes do último encerramento
+        sheet_write_queue.recover()
+    return _gc
+
 def initialize_services():
     """
     Inicializa os serviços do Google (Calendar e Sheets) usando as credenciais do Service Account.
     
     Returns:
-        tuple: (calendar_service, gspread_client) ou (None, None) em caso de erro
+        tuple: (calendar_pool, gspread_client), com None no lugar de cada serviço que falhou
     """
-    try:
-        # Autenticação usando o arquivo de credenciais do Service Account
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE_PATH,
-            scopes=SCOPES
-        )
-        
-        # Inicializa o serviço do Google Calendar
-        calendar_service = build('calendar', 'v3', credentials=creds)
-        
-        # Inicializa o cliente gspread para Google Sheets
-        gc = gspread.authorize(creds)
-        
-        return calendar_service, gc
-    except Exception as e:
-        print(f"Erro ao inicializar serviços: {e}")
-        return None, None
+    return get_calendar_pool(), get_sheets_client()
+
+def warmup() -> Dict[str, Any]:
+    """
+    Inicializa antecipadamente os serviços do Google e abre a worksheet da planilha,
+    para que a primeira conversa não pague esse custo.
+    
+    Returns:
+        dict: Status de cada serviço e o tempo gasto (em milissegundos) em cada etapa.
+    """
+    timings = {}
+    
+    started = time.perf_counter()
+    calendar_pool = get_calendar_pool()
+    timings["calendar_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    
+    started = time.perf_counter()
+    gc = get_sheets_client()
+    timings["sheets_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    
+    worksheet_ok = False
+    if gc and SHEET_ID:
+        started = time.perf_counter()
+        try:
+            worksheet_cache.get()
+            worksheet_ok = True
+        except Exception as e:
+            print(f"Erro ao abrir a planilha no warmup: {e}")
+        timings["worksheet_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    
+    return {
+        "calendar": calendar_pool is not None,
+        "sheets": gc is not None,
+        "worksheet": worksheet_ok,
+        "timings": timings,
+        "calendar_discovery": dict(discovery_stats),
+        "connection_pools": pool_stats(),
+        "retries": retry_policy.metrics(),
+        "rate_limits": rate_limit_stats()
+    }
 
-# Inicializa os serviços
-calendar_service, gc = initialize_services()
+def pool_stats() -> Dict[str, Any]:
+    """
+    Retorna o uso dos pools de clientes/conexões das APIs do Google.
+    
+    Returns:
+        dict: Estatísticas do pool de clientes do Calendar e das conexões do Sheets (None se ainda não criados).
+    """
+    calendar_pool = _calendar_pool if _calendar_pool is not _NOT_INITIALIZED else None
+    return {
+        "calendar": dict(calendar_pool.stats) if calendar_pool else None,
+        "sheets": adapter_stats(_sheets_adapter) if _sheets_adapter else None,
+        "httpx": transport_stats.snapshot() if HTTP_TRANSPORT == 'httpx' else None
+    }
+
+# Retentativas das chamadas às APIs do Google (erros de cota e HTTP 500/503), com métricas por ferramenta
+retry_policy = RetryPolicy(
+    max_attempts=RETRY_MAX_ATTEMPTS,
+    base_delay=RETRY_BASE_DELAY_SECONDS,
+    max_delay=RETRY_MAX_DELAY_SECONDS,
+    deadline_seconds=RETRY_DEADLINE_SECONDS
+)
+
+def _rate_limiter(name: str, per_minute: float) -> Optional[TokenBucket]:
+    """
+    Cria o limitador de taxa de uma API, com rajadas de até 10 segundos de cota (None se desativado).
+    """
+    if per_minute <= 0:
+        return None
+    return TokenBucket(name, per_minute, burst=max(1, int(per_minute // 6)), max_wait_seconds=RATE_LIMIT_MAX_WAIT_SECONDS)
+
+# Limitadores de taxa compartilhados pelo processo, um por API
+sheets_limiter = _rate_limiter("Sheets", SHEETS_REQUESTS_PER_MINUTE)
+calendar_limiter = _rate_limiter("Calendar", CALENDAR_REQUESTS_PER_MINUTE)
+
+def rate_limit_stats() -> Dict[str, Any]:
+    """
+    Retorna o uso dos limitadores de taxa de cada API.
+    
+    Returns:
+        dict: Fichas disponíveis, esperas, descartes e profundidade da fila de cada limitador (None se desativado).
+    """
+    return {
+        "sheets": sheets_limiter.snapshot() if sheets_limiter else None,
+        "calendar": calendar_limiter.snapshot() if calendar_limiter else None
+    }
+
+# Índice do histórico por placa (evita baixar a planilha inteira a cada consulta)
+history_index = HistoryIndex(ttl_seconds=HISTORY_INDEX_TTL_SECONDS)
+history_sync = HistorySync(history_index, full_reload_seconds=HISTORY_FULL_RELOAD_SECONDS)
+
+def _open_worksheet():
+    """
+    Abre a primeira worksheet da planilha (uma requisição de metadados, sujeita ao limitador do Sheets).
+    """
+    if sheets_limiter is not None:
+        sheets_limiter.acquire()
+    return get_sheets_client().open_by_key(SHEET_ID).sheet1
+
+# Handle da worksheet compartilhado pelas ferramentas (evita a requisição de metadados a cada chamada)
+worksheet_cache = WorksheetCache(_open_worksheet, ttl_seconds=WORKSHEET_CACHE_TTL_SECONDS)
+
+def _on_sheet_write_error(error: Exception) -> None:
+    """
+    Descarta o handle da worksheet quando a gravação de um lote falha na API.
+    """
+    if isinstance(error, gspread.exceptions.APIError):
+        worksheet_cache.invalidate()
+
+# Fila write-behind: as linhas novas são gravadas em lote com uma única chamada append_rows
+sheet_write_queue = SheetWriteQueue(
+    worksheet_cache.get,
+    flush_interval=SHEET_WRITE_FLUSH_SECONDS,
+    max_batch=SHEET_WRITE_BATCH_SIZE,
+    journal=WriteJournal(SHEET_JOURNAL_PATH),
+    # Os novos registros devem aparecer na próxima consulta de histórico
+    on_flushed=lambda row_ids: history_index.invalidate(),
+    on_error=_on_sheet_write_error,
+    rate_limiter=sheets_limiter,
+    # Com a API fora do ar ou sem cota, as linhas continuam pendentes (e no journal) até serem gravadas
+    is_transient=is_transient,
+    backoff_base=max(1.0, SHEET_WRITE_FLUSH_SECONDS),
+    max_backoff=SHEET_WRITE_MAX_BACKOFF_SECONDS,
+)
+
+# Horários ocupados por dia, atualizados na hora quando o agente cria um evento
+freebusy_cache = FreeBusyCache(ttl_seconds=FREEBUSY_CACHE_TTL_SECONDS)
+
+# Espelho local de cada calendário de box (usado quando CALENDAR_SYNC_ENABLED=TRUE)
+calendar_syncs = {
+    calendar_id: CalendarSync(
+        CalendarEventStore(pytz.timezone(TIMEZONE)),
+        calendar_id=calendar_id,
+        max_staleness_seconds=CALENDAR_SYNC_MAX_STALENESS_SECONDS
+    )
+    for calendar_id in CALENDAR_IDS
+}
+
+# Executor das ferramentas assíncronas: as chamadas bloqueantes às APIs rodam fora
+# do event loop do ADK, com no máximo TOOL_EXECUTOR_WORKERS chamadas simultâneas
+_tool_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=TOOL_EXECUTOR_WORKERS,
+    thread_name_prefix='autoagenda-tool'
+)
+
+# Mantém atômicas a escolha do box livre e a criação do evento
+_booking_lock = threading.Lock()
+
+def _call_tool(func, *args, **kwargs):
+    """
+    Executa uma ferramenta dentro do escopo de retentativas (orçamento de tempo e métricas por ferramenta).
+    """
+    with retry_policy.scope(func.__name__):
+        return func(*args, **kwargs)
+
+def _run_in_executor(func):
+    """
+    Cria a variante assíncrona de uma ferramenta bloqueante, executada em ``_tool_executor``.
+
+    A assinatura e a docstring da função original são preservadas, para que o
+    FunctionTool gere a mesma declaração para o modelo.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_tool_executor, functools.partial(_call_tool, func, *args, **kwargs))
+    return wrapper
 
 # Definição das ferramentas (tools) do agente
 
@@ -77,6 +469,7 @@ def buscar_historico_cliente(placa_veiculo: str) -> Dict[str, Any]:
         dict: Dicionário contendo status da operação ('success' ou 'error') e 
               os dados do histórico ou mensagem de erro.
     """
+    gc = get_sheets_client()
     if not gc or not SHEET_ID:
         return {
             "status": "error",
@@ -84,32 +477,18 @@ def buscar_historico_cliente(placa_veiculo: str) -> Dict[str, Any]:
         }
     
     try:
-        sheet = gc.open_by_key(SHEET_ID).sheet1
-        all_data = sheet.get_all_records()
+        # Atualiza o índice (somente linhas novas) apenas quando ele expirou ou foi invalidado
+        if history_index.is_stale():
+            sheet = retry_policy.call(worksheet_cache.get)
+            retry_policy.call(history_sync.sync, sheet, limiter=sheets_limiter)
         
-        history = []
-        plate_column_header = 'placa_veiculo'
-        date_column_header = 'data_agendamento'
-        km_column_header = 'km_atual'
-        service_column_header = 'servico_realizado'
-        notes_column_header = 'observacoes'
-        
-        if not all_data or plate_column_header not in all_data[0]:
+        if PLATE_COLUMN_HEADER not in history_sync.header:
             return {
                 "status": "error",
-                "error_message": f"Não foi possível encontrar a coluna '{plate_column_header}' na planilha ou a planilha está vazia."
+                "error_message": f"Não foi possível encontrar a coluna '{PLATE_COLUMN_HEADER}' na planilha ou a planilha está vazia."
             }
         
-        for record in all_data:
-            # Comparação case-insensitive e sem espaços extras
-            if str(record.get(plate_column_header, '')).strip().upper() == placa_veiculo.strip().upper():
-                entry = {
-                    "Data": record.get(date_column_header, "N/A"),
-                    "KM": record.get(km_column_header, "N/A"),
-                    "Servico": record.get(service_column_header, "N/A"),
-                    "Observacoes": record.get(notes_column_header, "")
-                }
-                history.append(entry)
+        history = history_index.lookup(placa_veiculo)
         
         if not history:
             return {
@@ -127,6 +506,7 @@ def buscar_historico_cliente(placa_veiculo: str) -> Dict[str, Any]:
             }
     
     except gspread.exceptions.APIError as e:
+        worksheet_cache.invalidate()
         return {
             "status": "error",
             "error_message": f"Erro ao acessar a API do Google Sheets: {e}. Verifique as permissões."
@@ -168,6 +548,7 @@ def registrar_manutencao_planilha(
         dict: Dicionário contendo status da operação ('success' ou 'error') e 
               mensagem de confirmação ou erro.
     """
+    gc = get_sheets_client()
     if not gc or not SHEET_ID:
         return {
             "status": "error",
@@ -175,8 +556,6 @@ def registrar_manutencao_planilha(
         }
     
     try:
-        sheet = gc.open_by_key(SHEET_ID).sheet1
-        
         # Define o fuso horário desejado
         target_timezone = pytz.timezone(TIMEZONE)
         
@@ -206,24 +585,229 @@ def registrar_manutencao_planilha(
             local_timestamp_str  # Timestamp local formatado
         ]
         
-        sheet.append_row(new_row)
+        # A linha é registrada no journal local e gravada em lote pela fila write-behind (veja write_queue.py)
+        row_id = sheet_write_queue.enqueue(new_row)
         
         return {
             "status": "success",
-            "message": f"Agendamento para {nome_cliente} (placa {placa_veiculo}) registrado com sucesso na planilha."
+            "message": f"Agendamento para {nome_cliente} (placa {placa_veiculo}) registrado com sucesso e na fila de gravação da planilha.",
+            "registro_id": row_id
         }
     
-    except gspread.exceptions.APIError as e:
-        return {
-            "status": "error",
-            "error_message": f"Erro ao acessar a API do Google Sheets: {e}. Verifique as permissões."
-        }
     except Exception as e:
         return {
             "status": "error",
             "error_message": f"Erro ao registrar manutenção no Google Sheets: {e}"
         }
 
+def _work_window(day: datetime.date):
+    """
+    Calcula a janela de trabalho de um dia no fuso horário local.
+    
+    Args:
+        day (datetime.date): Dia desejado.
+        
+    Returns:
+        tuple: (início, fim) do horário de trabalho, como datetimes com fuso horário.
+    """
+    target_timezone = pytz.timezone(TIMEZONE)
+    return (
+        target_timezone.localize(datetime.datetime.combine(day, WORK_START_TIME)),
+        target_timezone.localize(datetime.datetime.combine(day, WORK_END_TIME))
+    )
+
+def _query_busy(calendar_pool, time_min: datetime.datetime, time_max: datetime.datetime) -> Dict[str, List[Any]]:
+    """
+    Consulta os intervalos ocupados de todos os boxes com uma única chamada freebusy.
+    
+    Args:
+        calendar_pool (ClientPool): Pool de clientes do Google Calendar.
+        time_min (datetime): Início do intervalo consultado (com fuso horário).
+        time_max (datetime): Fim do intervalo consultado (com fuso horário).
+        
+    Returns:
+        dict: Id do calendário -> intervalos (início, fim) ocupados e mesclados.
+              Um calendário que a API não conseguiu consultar é tratado como ocupado.
+    """
+    # Corpo da requisição para a API do Google Calendar
+    body = {
+        "timeMin": time_min.isoformat(),
+        "timeMax": time_max.isoformat(),
+        "timeZone": TIMEZONE,
+        "items": [{"id": calendar_id} for calendar_id in CALENDAR_IDS]
+    }
+    with calendar_pool.lease() as calendar_service:
+        events_result = retry_policy.call(calendar_service.freebusy().query(body=body).execute, limiter=calendar_limiter)
+    calendars = events_result.get('calendars', {})
+    
+    busy_by_calendar = {}
+    for calendar_id in CALENDAR_IDS:
+        result = calendars.get(calendar_id, {})
+        if result.get('errors'):
+            busy_by_calendar[calendar_id] = [(time_min, time_max)]
+        else:
+            busy_by_calendar[calendar_id] = slots.merge_intervals(slots.parse_busy(result.get('busy', [])))
+    return busy_by_calendar
+
+def _busy_intervals_by_day(calendar_pool, days: List[datetime.date]) -> Dict[datetime.date, Dict[str, List[Any]]]:
+    """
+    Retorna os intervalos ocupados (mesclados) de cada box em cada dia, usando o cache de freebusy.
+    
+    Os dias fora do cache são obtidos com uma única consulta freebusy cobrindo
+    todos os boxes, do primeiro ao último dia ausente. Com CALENDAR_SYNC_ENABLED,
+    a resposta vem do espelho local da agenda, sincronizado de forma incremental.
+    
+    Args:
+        calendar_pool (ClientPool): Pool de clientes do Google Calendar.
+        days (list): Dias consultados, em ordem crescente.
+        
+    Returns:
+        dict: Dia -> (id do calendário -> lista de intervalos (início, fim) ocupados).
+    """
+    if CALENDAR_SYNC_ENABLED:
+        with calendar_pool.lease() as calendar_service:
+            for calendar_sync in calendar_syncs.values():
+                retry_policy.call(calendar_sync.ensure_fresh, calendar_service, limiter=calendar_limiter)
+        return {
+            day: {
+                calendar_id: calendar_sync.store.busy_intervals(*_work_window(day))
+                for calendar_id, calendar_sync in calendar_syncs.items()
+            }
+            for day in days
+        }
+    
+    busy_by_day = {}
+    missing = []
+    for day in days:
+        cached = {calendar_id: freebusy_cache.get(calendar_id, day) for calendar_id in CALENDAR_IDS}
+        if any(busy is None for busy in cached.values()):
+            missing.append(day)
+        else:
+            busy_by_day[day] = cached
+    
+    if missing:
+        range_start, _ = _work_window(missing[0])
+        _, range_end = _work_window(missing[-1])
+        busy_by_calendar = _query_busy(calendar_pool, range_start, range_end)
+        for day in days:
+            if missing[0] <= day <= missing[-1]:
+                start_of_work_dt, end_of_work_dt = _work_window(day)
+                busy_by_day[day] = {}
+                for calendar_id, busy in busy_by_calendar.items():
+                    day_busy = [(start, end) for start, end in busy if start < end_of_work_dt and end > start_of_work_dt]
+                    freebusy_cache.put(calendar_id, day, day_busy)
+                    busy_by_day[day][calendar_id] = day_busy
+    
+    return busy_by_day
+
+def _busy_for_booking(calendar_pool, intervals: List[Any]) -> Dict[str, List[Any]]:
+    """
+    Consulta a agenda na hora (sem o cache) para escolher os boxes de uma reserva.
+    
+    O período consultado cobre os dias de trabalho das reservas e também cada
+    reserva inteira, mesmo que ela passe da janela de trabalho: os eventos que
+    terminam ou começam fora da janela também contam. Com CALENDAR_SYNC_ENABLED,
+    o espelho local é sincronizado antes da consulta; senão, o cache de freebusy
+    dos dias consultados é atualizado com a resposta.
+    
+    Args:
+        calendar_pool (ClientPool): Pool de clientes do Google Calendar.
+        intervals (list): Intervalos (início, fim) das reservas, com fuso horário.
+        
+    Returns:
+        dict: Id do calendário -> intervalos (início, fim) ocupados e mesclados no período.
+    """
+    days = sorted({start.date() for start, _ in intervals})
+    range_start = min([_work_window(days[0])[0]] + [start for start, _ in intervals])
+    range_end = max([_work_window(days[-1])[1]] + [end for _, end in intervals])
+    
+    if CALENDAR_SYNC_ENABLED:
+        with calendar_pool.lease() as calendar_service:
+            for calendar_sync in calendar_syncs.values():
+                retry_policy.call(calendar_sync.sync, calendar_service, limiter=calendar_limiter)
+        return {
+            calendar_id: calendar_sync.store.busy_intervals(range_start, range_end)
+            for calendar_id, calendar_sync in calendar_syncs.items()
+        }
+    
+    busy_by_calendar = _query_busy(calendar_pool, range_start, range_end)
+    day = days[0]
+    while day <= days[-1]:
+        start_of_work_dt, end_of_work_dt = _work_window(day)
+        for calendar_id, busy in busy_by_calendar.items():
+            freebusy_cache.put(
+                calendar_id, day,
+                [(start, end) for start, end in busy if start < end_of_work_dt and end > start_of_work_dt]
+            )
+        day += datetime.timedelta(days=1)
+    return busy_by_calendar
+
+def _within_work_hours(start_datetime: datetime.datetime, end_datetime: datetime.datetime) -> bool:
+    """
+    Indica se o serviço começa e termina dentro do horário de trabalho do mesmo dia.
+    
+    Args:
+        start_datetime (datetime): Início do serviço (horário local, sem fuso).
+        end_datetime (datetime): Fim do serviço (horário local, sem fuso).
+        
+    Returns:
+        bool: True se WORK_START_TIME <= início e fim <= WORK_END_TIME do dia do início.
+    """
+    end_of_work = datetime.datetime.combine(start_datetime.date(), WORK_END_TIME)
+    return start_datetime.time() >= WORK_START_TIME and end_datetime <= end_of_work
+
+def _available_slots_for_days(
+    days: List[datetime.date],
+    busy_by_day: Dict[datetime.date, Dict[str, List[Any]]],
+    duracao_minutos: int
+) -> Dict[datetime.date, List[datetime.datetime]]:
+    """
+    Calcula, para cada dia, os horários em que ao menos um box fica livre durante todo o serviço.
+    
+    Durações múltiplas de SLOT_GRANULARITY_MINUTES usam os bitmaps de ocupação
+    (todos os dias numa única passada, veja occupancy.py); as demais usam o
+    cálculo por intervalos livres (veja slots.py).
+    
+    Args:
+        days (list): Dias consultados, em ordem crescente.
+        busy_by_day (dict): Dia -> (id do calendário -> intervalos ocupados no dia).
+        duracao_minutos (int): Duração do serviço em minutos.
+        
+    Returns:
+        dict: Dia -> horários de início disponíveis, em ordem crescente.
+    """
+    windows = [_work_window(day) for day in days]
+    if duracao_minutos > 0 and duracao_minutos % SLOT_GRANULARITY_MINUTES == 0:
+        day_slots = occupancy.slots_for_days(
+            windows, [busy_by_day[day] for day in days], duracao_minutos, SLOT_GRANULARITY_MINUTES
+        )
+        return dict(zip(days, day_slots))
+    
+    available_by_day = {}
+    for day, (start_of_work_dt, end_of_work_dt) in zip(days, windows):
+        available = set()
+        for busy in busy_by_day[day].values():
+            available.update(slots.slots_in_window(start_of_work_dt, end_of_work_dt, busy, duracao_minutos))
+        available_by_day[day] = sorted(available)
+    return available_by_day
+
+def _find_free_calendar(busy_by_calendar: Dict[str, List[Any]], start: datetime.datetime, end: datetime.datetime) -> Optional[str]:
+    """
+    Escolhe o primeiro box (na ordem de CALENDAR_IDS) livre durante todo o intervalo.
+    
+    Args:
+        busy_by_calendar (dict): Id do calendário -> intervalos ocupados no dia.
+        start (datetime): Início do serviço (com fuso horário).
+        end (datetime): Fim do serviço (com fuso horário).
+        
+    Returns:
+        str: Id do calendário livre ou None se todos estiverem ocupados.
+    """
+    for calendar_id in CALENDAR_IDS:
+        if all(busy_end <= start or busy_start >= end for busy_start, busy_end in busy_by_calendar.get(calendar_id, [])):
+            return calendar_id
+    return None
+
 def verificar_disponibilidade_agenda(data_iso: str, duracao_minutos: int) -> Dict[str, Any]:
     """
     Verifica a disponibilidade de horários na agenda do Google Calendar para uma data específica.
@@ -236,74 +820,30 @@ def verificar_disponibilidade_agenda(data_iso: str, duracao_minutos: int) -> Dic
         dict: Dicionário contendo status da operação ('success' ou 'error'),
               lista de horários disponíveis ou mensagem de erro.
     """
-    if not calendar_service:
+    calendar_pool = get_calendar_pool()
+    if not calendar_pool:
         return {
             "status": "error",
             "error_message": "Serviço do Google Calendar não configurado."
         }
     
     try:
-        # Configuração de fuso horário e horário de trabalho
-        time_zone = TIMEZONE
-        start_time_of_day = datetime.time(9, 0)  # 9:00 AM
-        end_time_of_day = datetime.time(18, 0)   # 6:00 PM
-        
-        # Converte a data ISO para objeto datetime
-        start_date = datetime.datetime.fromisoformat(data_iso)
-        
-        # Cria os timestamps para a consulta de disponibilidade
-        time_min_dt = datetime.datetime.combine(start_date, start_time_of_day).isoformat() + 'Z'
-        time_max_dt = datetime.datetime.combine(start_date, end_time_of_day).isoformat() + 'Z'
-        
-        # Corpo da requisição para a API do Google Calendar
-        body = {
-            "timeMin": time_min_dt,
-            "timeMax": time_max_dt,
-            "timeZone": time_zone,
-            "items": [{"id": "primary"}]  # Verifica o calendário primário
-        }
+        # Converte a data ISO para objeto date
+        start_date = datetime.datetime.fromisoformat(data_iso).date()
         
-        # Executa a consulta de disponibilidade
-        events_result = calendar_service.freebusy().query(body=body).execute()
-        busy_slots = events_result.get('calendars', {}).get('primary', {}).get('busy', [])
-        
-        # Calcula os horários disponíveis
-        available_slots = []
-        current_check_time = datetime.datetime.combine(start_date, start_time_of_day)
-        end_of_work_dt = datetime.datetime.combine(start_date, end_time_of_day)
-        slot_duration = datetime.timedelta(minutes=duracao_minutos)
-        
-        while current_check_time + slot_duration <= end_of_work_dt:
-            is_free = True
-            slot_end_time = current_check_time + slot_duration
-            
-            # Verifica sobreposição com horários ocupados
-            for busy in busy_slots:
-                busy_start = datetime.datetime.fromisoformat(busy['start'].replace('Z', '+00:00'))
-                busy_end = datetime.datetime.fromisoformat(busy['end'].replace('Z', '+00:00'))
-                
-                # Converte para comparação
-                current_check_time_aware = datetime.datetime.fromisoformat(f"{current_check_time.strftime('%Y-%m-%dT%H:%M:%S')}")
-                slot_end_time_aware = datetime.datetime.fromisoformat(f"{slot_end_time.strftime('%Y-%m-%dT%H:%M:%S')}")
-                
-                # Verifica se o slot proposto [start, end) se sobrepõe ao slot ocupado [busy_start, busy_end)
-                if max(current_check_time_aware, busy_start.replace(tzinfo=None)) < min(slot_end_time_aware, busy_end.replace(tzinfo=None)):
-                    is_free = False
-                    # Move o tempo de verificação para o final deste slot ocupado
-                    current_check_time = busy_end.replace(tzinfo=None)
-                    break
-            
-            if is_free:
-                # Formata HH:MM usando o datetime original
-                available_slots.append(current_check_time.strftime("%H:%M"))
-                # Move para o próximo horário potencial
-                current_check_time += slot_duration
-            # Se não estiver livre, current_check_time já foi avançado além do slot ocupado
+        # Executa a consulta de disponibilidade de todos os boxes (ou usa o cache do dia)
+        busy_by_calendar = _busy_intervals_by_day(calendar_pool, [start_date])[start_date]
+        
+        # Calcula os horários disponíveis a partir dos intervalos livres (veja slots.py)
+        available_slots = [
+            slot.strftime("%H:%M")
+            for slot in _available_slots_for_days([start_date], {start_date: busy_by_calendar}, duracao_minutos)[start_date]
+        ]
         
         if not available_slots:
             return {
                 "status": "success",
-                "message": f"Nenhum horário disponível encontrado para {data_iso} com duração de {duracao_minutos} minutos entre {start_time_of_day.strftime('%H:%M')} e {end_time_of_day.strftime('%H:%M')}.",
+                "message": f"Nenhum horário disponível encontrado para {data_iso} com duração de {duracao_minutos} minutos entre {WORK_START_TIME.strftime('%H:%M')} e {WORK_END_TIME.strftime('%H:%M')}.",
                 "available_slots": []
             }
         else:
@@ -319,6 +859,151 @@ def verificar_disponibilidade_agenda(data_iso: str, duracao_minutos: int) -> Dic
             "error_message": f"Erro ao verificar disponibilidade no Google Calendar: {e}"
         }
 
+def buscar_proximos_horarios_disponiveis(
+    data_inicio_iso: str,
+    duracao_minutos: int,
+    quantidade_dias: int,
+    max_horarios: int
+) -> Dict[str, Any]:
+    """
+    Busca horários disponíveis em vários dias seguidos com uma única consulta à agenda.
+    Útil para sugerir datas alternativas quando o dia desejado está cheio.
+    
+    Args:
+        data_inicio_iso (str): Primeiro dia da busca no formato ISO (YYYY-MM-DD).
+        duracao_minutos (int): Duração do compromisso em minutos.
+        quantidade_dias (int): Quantidade de dias a verificar a partir de data_inicio_iso (máximo 31).
+        max_horarios (int): Número máximo de horários retornados no total.
+        
+    Returns:
+        dict: Dicionário contendo status da operação ('success' ou 'error'),
+              horários disponíveis agrupados por dia ou mensagem de erro.
+    """
+    calendar_pool = get_calendar_pool()
+    if not calendar_pool:
+        return {
+            "status": "error",
+            "error_message": "Serviço do Google Calendar não configurado."
+        }
+    
+    try:
+        first_day = datetime.datetime.fromisoformat(data_inicio_iso).date()
+        quantidade_dias = max(1, min(int(quantidade_dias), MAX_SEARCH_DAYS))
+        max_horarios = max(1, int(max_horarios))
+        days = [first_day + datetime.timedelta(days=offset) for offset in range(quantidade_dias)]
+        
+        # No máximo uma consulta freebusy cobrindo todos os dias fora do cache
+        busy_by_day = _busy_intervals_by_day(calendar_pool, days)
+        
+        # Calcula os horários de todos os dias localmente
+        slots_by_day = _available_slots_for_days(days, busy_by_day, duracao_minutos)
+        available_days = []
+        remaining = max_horarios
+        for day in days:
+            day_slots = slots_by_day[day]
+            if day_slots:
+                available_days.append({
+                    "data": day.isoformat(),
+                    "available_slots": [slot.strftime("%H:%M") for slot in day_slots[:remaining]]
+                })
+                remaining -= len(available_days[-1]["available_slots"])
+            if remaining <= 0:
+                break
+        
+        if not available_days:
+            return {
+                "status": "success",
+                "message": f"Nenhum horário disponível entre {days[0].isoformat()} e {days[-1].isoformat()} com duração de {duracao_minutos} minutos.",
+                "dias": []
+            }
+        else:
+            return {
+                "status": "success",
+                "message": f"Próximos horários disponíveis a partir de {days[0].isoformat()} (duração de {duracao_minutos} min).",
+                "dias": available_days
+            }
+    
+    except Exception as e:
+        return {
+            "status": "error",
+            "error_message": f"Erro ao buscar horários disponíveis no Google Calendar: {e}"
+        }
+
+def _event_body(
+    titulo: str,
+    start_datetime: datetime.datetime,
+    end_datetime: datetime.datetime,
+    descricao: str,
+    email_convidado: str
+):
+    """
+    Monta o corpo de um evento da oficina para ``events().insert``.
+    
+    Args:
+        titulo (str): Título do evento.
+        start_datetime (datetime): Início do evento (horário local, sem fuso).
+        end_datetime (datetime): Fim do evento (horário local, sem fuso).
+        descricao (str): Descrição do evento.
+        email_convidado (str): Email do convidado ou string vazia.
+        
+    Returns:
+        tuple: (corpo do evento, se as notificações devem ser enviadas ao convidado).
+    """
+    event = {
+        # Id definido aqui (e não pela API): uma retentativa do insert não duplica o evento
+        'id': uuid.uuid4().hex,
+        'summary': titulo,
+        'location': 'Oficina',  # Opcional: define um local padrão
+        'description': descricao,
+        'start': {
+            'dateTime': start_datetime.isoformat(),
+            'timeZone': TIMEZONE,
+        },
+        'end': {
+            'dateTime': end_datetime.isoformat(),
+            'timeZone': TIMEZONE,
+        },
+        'reminders': {'useDefault': True},
+    }
+    
+    # Adiciona convidados se especificado
+    if email_convidado and email_convidado.strip():  # Verifica se o email não é vazio
+        event['attendees'] = [{'email': email_convidado}]
+        return event, True
+    return event, False
+
+def _insert_event(calendar_service, calendar_id: str, event: Dict[str, Any], send_notifications: bool) -> Dict[str, Any]:
+    """
+    Cria um evento com retentativas para erros transitórios.
+    
+    Se uma tentativa anterior chegou a criar o evento antes de falhar (ex.: HTTP 503
+    após a gravação), a nova tentativa recebe HTTP 409 para o mesmo id e o evento
+    já criado é retornado.
+    
+    Args:
+        calendar_service: Cliente do Google Calendar emprestado do pool.
+        calendar_id (str): Calendário do box.
+        event (dict): Corpo do evento, de ``_event_body``.
+        send_notifications (bool): Se as notificações devem ser enviadas ao convidado.
+        
+    Returns:
+        dict: Evento criado.
+    """
+    request = calendar_service.events().insert(
+        calendarId=calendar_id,
+        body=event,
+        sendNotifications=send_notifications
+    )
+    try:
+        return retry_policy.call(request.execute, limiter=calendar_limiter)
+    except HttpError as e:
+        if e.resp.status != 409:
+            raise
+        return retry_policy.call(
+            calendar_service.events().get(calendarId=calendar_id, eventId=event['id']).execute,
+            limiter=calendar_limiter
+        )
+
 def criar_evento_agenda(
     titulo: str, 
     data_iso: str, 
@@ -328,7 +1013,7 @@ def criar_evento_agenda(
     email_convidado: str
 ) -> Dict[str, Any]:
     """
-    Cria um evento no Google Calendar.
+    Cria um evento no Google Calendar, no calendário de um box livre no horário.
     
     Args:
         titulo (str): Título do evento.
@@ -342,7 +1027,8 @@ def criar_evento_agenda(
         dict: Dicionário contendo status da operação ('success' ou 'error'),
               detalhes do evento criado ou mensagem de erro.
     """
-    if not calendar_service:
+    calendar_pool = get_calendar_pool()
+    if not calendar_pool:
         return {
             "status": "error",
             "error_message": "Serviço do Google Calendar não configurado."
@@ -355,44 +1041,48 @@ def criar_evento_agenda(
         
         # Configuração de fuso horário
         time_zone = TIMEZONE
+        target_timezone = pytz.timezone(time_zone)
+        start_aware = target_timezone.localize(start_datetime)
+        end_aware = target_timezone.localize(end_datetime)
         
-        # Cria o corpo do evento
-        event = {
-            'summary': titulo,
-            'location': 'Oficina',  # Opcional: define um local padrão
-            'description': descricao,
-            'start': {
-                'dateTime': start_datetime.isoformat(),
-                'timeZone': time_zone,
-            },
-            'end': {
-                'dateTime': end_datetime.isoformat(),
-                'timeZone': time_zone,
-            },
-            'reminders': {'useDefault': True},
-        }
-        
-        # Adiciona convidados se especificado
-        attendees = []
-        if email_convidado and email_convidado.strip():  # Verifica se o email não é vazio
-            attendees.append({'email': email_convidado})
-            event['attendees'] = attendees
-            send_notifications = True
-        else:
-            send_notifications = False
+        if not _within_work_hours(start_datetime, end_datetime):
+            return {
+                "status": "error",
+                "error_message": f"O serviço precisa começar e terminar dentro do horário de trabalho ({WORK_START_TIME:%H:%M} às {WORK_END_TIME:%H:%M})."
+            }
         
-        # Cria o evento no Google Calendar
-        created_event = calendar_service.events().insert(
-            calendarId='primary',
-            body=event,
-            sendNotifications=send_notifications
-        ).execute()
+        # Seleção do box e criação do evento são atômicas: duas conversas simultâneas
+        # não podem reservar o mesmo box para o mesmo horário
+        with _booking_lock:
+            # Escolhe um box livre durante todo o serviço, com a agenda consultada agora:
+            # o cache pode não conter eventos criados fora do agente
+            busy_by_calendar = _busy_for_booking(calendar_pool, [(start_aware, end_aware)])
+            calendar_id = _find_free_calendar(busy_by_calendar, start_aware, end_aware)
+            if calendar_id is None:
+                return {
+                    "status": "error",
+                    "error_message": f"Não há box disponível em {data_iso} às {hora_inicio} para um serviço de {duracao_minutos} minutos. Verifique a disponibilidade novamente."
+                }
+
+            # Cria o corpo do evento
+            event, send_notifications = _event_body(titulo, start_datetime, end_datetime, descricao, email_convidado)
+
+            # Cria o evento no Google Calendar
+            with calendar_pool.lease() as calendar_service:
+                created_event = _insert_event(calendar_service, calendar_id, event, send_notifications)
+
+            # Write-through: o horário reservado passa a constar como ocupado no cache do dia
+            freebusy_cache.add_busy(calendar_id, start_datetime.date(), (start_aware, end_aware))
+            if CALENDAR_SYNC_ENABLED:
+                calendar_syncs[calendar_id].store.apply(created_event)
+
         
         return {
             "status": "success",
             "message": f"Evento '{created_event.get('summary')}' criado com sucesso em {data_iso} às {hora_inicio}.",
             "event_id": created_event.get('id'),
-            "event_link": created_event.get('htmlLink')
+            "event_link": created_event.get('htmlLink'),
+            "calendar_id": calendar_id
         }
     
     except HttpError as e:
@@ -422,11 +1112,295 @@ def criar_evento_agenda(
             "error_message": f"Erro geral ao criar evento no Google Calendar: {e}"
         }
 
+def criar_eventos_agenda_em_lote(eventos: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Cria vários eventos no Google Calendar de uma só vez (ex.: vários veículos de um cliente frotista).
+
+    Cada evento é colocado em um box livre no horário; os eventos do próprio lote
+    também são considerados ao escolher os boxes. Todos os eventos são enviados
+    em uma única requisição em lote à API.
+
+    Args:
+        eventos (list): Lista de eventos, cada um um objeto com as chaves
+            'titulo' (str), 'data_iso' (str, YYYY-MM-DD), 'hora_inicio' (str, HH:MM),
+            'duracao_minutos' (int) e, opcionalmente, 'descricao' (str) e 'email_convidado' (str).
+
+    Returns:
+        dict: Status geral ('success', 'partial' ou 'error'), quantidade de eventos
+              criados e a lista 'resultados' com o resultado de cada evento, na ordem recebida.
+    """
+    calendar_pool = get_calendar_pool()
+    if not calendar_pool:
+        return {
+            "status": "error",
+            "error_message": "Serviço do Google Calendar não configurado."
+        }
+    if not eventos:
+        return {
+            "status": "error",
+            "error_message": "Nenhum evento informado."
+        }
+
+    target_timezone = pytz.timezone(TIMEZONE)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(eventos)
+
+    # Interpreta e valida cada item; erros de um item não impedem os demais
+    parsed = []
+    for index, item in enumerate(eventos):
+        try:
+            if not isinstance(item, dict):
+                raise TypeError("cada evento deve ser um objeto")
+            if not isinstance(item['titulo'], str) or not item['titulo'].strip():
+                raise ValueError("'titulo' deve ser um texto não vazio")
+            for key in ('descricao', 'email_convidado'):
+                if not isinstance(item.get(key, ''), str):
+                    raise TypeError(f"'{key}' deve ser um texto")
+            start_datetime = datetime.datetime.fromisoformat(f"{item['data_iso']}T{item['hora_inicio']}:00")
+            end_datetime = start_datetime + datetime.timedelta(minutes=int(item['duracao_minutos']))
+            if not _within_work_hours(start_datetime, end_datetime):
+                raise ValueError(
+                    f"o serviço precisa começar e terminar dentro do horário de trabalho ({WORK_START_TIME:%H:%M} às {WORK_END_TIME:%H:%M})"
+                )
+            parsed.append((index, item, start_datetime, end_datetime))
+        except KeyError as e:
+            results[index] = {"status": "error", "error_message": f"Evento inválido: campo obrigatório ausente {e}"}
+        except (TypeError, ValueError) as e:
+            results[index] = {"status": "error", "error_message": f"Evento inválido: {e}"}
+
+    # Por id da requisição no lote: (índice, calendar_id, início, fim)
+    planned: Dict[str, Any] = {}
+    # Itens a reenviar (erro transitório) e itens já criados por uma tentativa anterior (HTTP 409)
+    retryable: Dict[str, Exception] = {}
+    existing: List[str] = []
+
+    def on_response(request_id, response, exception):
+        index, calendar_id, start_aware, end_aware = planned[request_id]
+        if exception is not None:
+            if is_retryable(exception):
+                retryable[request_id] = exception
+            elif isinstance(exception, HttpError) and exception.resp.status == 409:
+                existing.append(request_id)
+                return
+            message = None
+            if isinstance(exception, HttpError):
+                message = json.loads(exception.content).get('error', {}).get('message')
+            results[index] = {
+                "status": "error",
+                "error_message": f"Erro ao criar evento no Google Calendar: {message or exception}"
+            }
+            return
+        # Write-through: o horário reservado passa a constar como ocupado no cache do dia
+        freebusy_cache.add_busy(calendar_id, start_aware.date(), (start_aware, end_aware))
+        if CALENDAR_SYNC_ENABLED:
+            calendar_syncs[calendar_id].store.apply(response)
+        results[index] = {
+            "status": "success",
+            "event_id": response.get('id'),
+            "event_link": response.get('htmlLink'),
+            "calendar_id": calendar_id
+        }
+
+    try:
+        # Seleção dos boxes e criação dos eventos são atômicas em relação às outras conversas
+        with _booking_lock:
+            intervals = [
+                (target_timezone.localize(start_datetime), target_timezone.localize(end_datetime))
+                for _, _, start_datetime, end_datetime in parsed
+            ]
+            busy_by_calendar = _busy_for_booking(calendar_pool, intervals) if intervals else {}
+
+            inserts = []
+            for (index, item, start_datetime, end_datetime), (start_aware, end_aware) in zip(parsed, intervals):
+                calendar_id = _find_free_calendar(busy_by_calendar, start_aware, end_aware)
+                if calendar_id is None:
+                    results[index] = {
+                        "status": "error",
+                        "error_message": f"Não há box disponível em {item['data_iso']} às {item['hora_inicio']} para um serviço de {item['duracao_minutos']} minutos."
+                    }
+                    continue
+                # O horário passa a constar como ocupado para os próximos itens do lote
+                busy_by_calendar[calendar_id] = slots.merge_intervals(
+                    list(busy_by_calendar.get(calendar_id, [])) + [(start_aware, end_aware)]
+                )
+                event, send_notifications = _event_body(
+                    item['titulo'], start_datetime, end_datetime,
+                    item.get('descricao', ''), item.get('email_convidado', '')
+                )
+                planned[str(index)] = (index, calendar_id, start_aware, end_aware)
+                inserts.append((str(index), calendar_id, event, send_notifications))
+
+            # Uma requisição em lote para cada CALENDAR_BATCH_SIZE eventos (no máximo a rajada
+            # do limitador de taxa, para que um lote nunca custe mais fichas do que o balde
+            # comporta); os itens que falharam com erro transitório são reenviados em novos
+            # lotes, com backoff
+            chunk_size = CALENDAR_BATCH_SIZE
+            if calendar_limiter is not None:
+                chunk_size = min(chunk_size, calendar_limiter.burst)
+            with calendar_pool.lease() as calendar_service:
+                deadline = retry_policy.deadline()
+                pending = inserts
+                attempt = 0
+                while pending:
+                    retryable.clear()
+                    for offset in range(0, len(pending), chunk_size):
+                        chunk = pending[offset:offset + chunk_size]
+                        batch = calendar_service.new_batch_http_request(callback=on_response)
+                        for request_id, calendar_id, event, send_notifications in chunk:
+                            batch.add(
+                                calendar_service.events().insert(
+                                    calendarId=calendar_id,
+                                    body=event,
+                                    sendNotifications=send_notifications
+                                ),
+                                request_id=request_id
+                            )
+                        # Cada requisição do lote conta na cota da API
+                        retry_policy.call(batch.execute, limiter=calendar_limiter, cost=len(chunk))
+                    for request_id, calendar_id, event, _ in pending:
+                        if request_id in existing:
+                            on_response(request_id, retry_policy.call(
+                                calendar_service.events().get(calendarId=calendar_id, eventId=event['id']).execute,
+                                limiter=calendar_limiter
+                            ), None)
+                    existing.clear()
+                    if not retryable:
+                        if attempt:
+                            retry_policy.record_recovered()
+                        break
+                    delay = retry_policy.next_delay(attempt, next(iter(retryable.values())), deadline)
+                    if delay is None:
+                        retry_policy.record_exhausted()
+                        break
+                    retry_policy.wait(delay)
+                    attempt += 1
+                    pending = [insert for insert in inserts if insert[0] in retryable]
+    except Exception as e:
+        # Falha do lote inteiro (ex.: conexão): os itens ainda sem resultado recebem o erro
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = {
+                    "status": "error",
+                    "error_message": f"Erro geral ao criar evento no Google Calendar: {e}"
+                }
+
+    created = sum(1 for result in results if result["status"] == "success")
+    if created == len(eventos):
+        status = "success"
+    elif created:
+        status = "partial"
+    else:
+        status = "error"
+    return {
+        "status": status,
+        "message": f"{created} de {len(eventos)} eventos criados.",
+        "criados": created,
+        "resultados": results
+    }
+
+async def agendar_manutencao(
+    nome_cliente: str,
+    contato: str,
+    placa_veiculo: str,
+    modelo_veiculo: str,
+    ano_veiculo: str,
+    km_atual: str,
+    data_agendamento: str,
+    hora_agendamento: str,
+    duracao_minutos: int,
+    servico_agendado: str,
+    observacoes: str,
+    email_convidado: str
+) -> Dict[str, Any]:
+    """
+    Agenda uma manutenção completa: registra na planilha e cria o evento no Google Calendar ao mesmo tempo.
+    
+    Args:
+        nome_cliente (str): Nome do cliente.
+        contato (str): Informações de contato do cliente.
+        placa_veiculo (str): Placa do veículo.
+        modelo_veiculo (str): Modelo do veículo.
+        ano_veiculo (str): Ano do veículo.
+        km_atual (str): Quilometragem atual do veículo.
+        data_agendamento (str): Data do agendamento (formato YYYY-MM-DD).
+        hora_agendamento (str): Hora do agendamento (formato HH:MM).
+        duracao_minutos (int): Duração do serviço em minutos.
+        servico_agendado (str): Descrição do serviço agendado.
+        observacoes (str): Observações adicionais. Use string vazia se não houver observações.
+        email_convidado (str): Email do cliente para o convite do evento. Use string vazia se não houver.
+        
+    Returns:
+        dict: Status geral ('success', 'partial' ou 'error'), um resumo de cada parte
+              (ex.: "agenda ok, planilha na fila") e o resultado individual da
+              planilha ('planilha') e da agenda ('agenda').
+    """
+    titulo = f"{servico_agendado} - {placa_veiculo}"
+    descricao = "\n".join(
+        line for line in (
+            f"Cliente: {nome_cliente} ({contato})",
+            f"Veículo: {modelo_veiculo} {ano_veiculo}, placa {placa_veiculo}, {km_atual} km",
+            f"Observações: {observacoes}" if observacoes else "",
+        ) if line
+    )
+    
+    # As duas gravações são independentes: a latência total é a da mais lenta
+    loop = asyncio.get_running_loop()
+    sheet_result, calendar_result = await asyncio.gather(
+        loop.run_in_executor(_tool_executor, functools.partial(
+            _call_tool, registrar_manutencao_planilha,
+            nome_cliente, contato, placa_veiculo, modelo_veiculo, ano_veiculo, km_atual,
+            data_agendamento, hora_agendamento, servico_agendado, observacoes
+        )),
+        loop.run_in_executor(_tool_executor, functools.partial(
+            _call_tool, criar_evento_agenda,
+            titulo, data_agendamento, hora_agendamento, duracao_minutos, descricao, email_convidado
+        )),
+    )
+    
+    calendar_ok = calendar_result.get("status") == "success"
+    sheet_ok = sheet_result.get("status") == "success"
+    if sheet_ok:
+        # A linha só é confirmada na planilha quando a fila write-behind a grava
+        outcome = sheet_write_queue.outcome(sheet_result["registro_id"]) or {}
+        sheet_summary = "planilha ok" if outcome.get("status") == "written" else "planilha na fila"
+    else:
+        sheet_summary = "planilha falhou"
+    calendar_summary = "agenda ok" if calendar_ok else "agenda falhou"
+    
+    if calendar_ok and sheet_ok:
+        status = "success"
+    elif calendar_ok or sheet_ok:
+        status = "partial"
+    else:
+        status = "error"
+    
+    return {
+        "status": status,
+        "message": f"{calendar_summary}, {sheet_summary}",
+        "agenda": calendar_result,
+        "planilha": sheet_result
+    }
+
+# Variantes assíncronas das ferramentas: não bloqueiam o event loop enquanto aguardam as APIs
+buscar_historico_cliente_async = _run_in_executor(buscar_historico_cliente)
+registrar_manutencao_planilha_async = _run_in_executor(registrar_manutencao_planilha)
+verificar_disponibilidade_agenda_async = _run_in_executor(verificar_disponibilidade_agenda)
+buscar_proximos_horarios_disponiveis_async = _run_in_executor(buscar_proximos_horarios_disponiveis)
+criar_evento_agenda_async = _run_in_executor(criar_evento_agenda)
+criar_eventos_agenda_em_lote_async = _run_in_executor(criar_eventos_agenda_em_lote)
+
 # Criação das ferramentas (FunctionTools) para o ADK
-buscar_historico_tool = FunctionTool(func=buscar_historico_cliente)
-registrar_manutencao_tool = FunctionTool(func=registrar_manutencao_planilha)
-verificar_disponibilidade_tool = FunctionTool(func=verificar_disponibilidade_agenda)
-criar_evento_tool = FunctionTool(func=criar_evento_agenda)
+buscar_historico_tool = FunctionTool(func=buscar_historico_cliente_async)
+registrar_manutencao_tool = FunctionTool(func=registrar_manutencao_planilha_async)
+verificar_disponibilidade_tool = FunctionTool(func=verificar_disponibilidade_agenda_async)
+buscar_proximos_horarios_tool = FunctionTool(func=buscar_proximos_horarios_disponiveis_async)
+criar_evento_tool = FunctionTool(func=criar_evento_agenda_async)
+criar_eventos_em_lote_tool = FunctionTool(func=criar_eventos_agenda_em_lote_async)
+agendar_manutencao_tool = FunctionTool(func=agendar_manutencao)
+# Limita o histórico enviado ao modelo a cada turno (veja context_compaction.py)
+context_compactor = ContextCompactor(
+    token_budget=CONTEXT_TOKEN_BUDGET,
+    tool_result_max_chars=CONTEXT_TOOL_RESULT_MAX_CHARS
+)
 
 # Definição do agente principal
 autoagenda_agent = Agent(
@@ -449,7 +1423,12 @@ autoagenda_agent = Agent(
     
     - verificar_disponibilidade_agenda: Use esta ferramenta quando o usuário quiser verificar horários disponíveis para agendamento. Você precisa da data (formato YYYY-MM-DD) e da duração em minutos.
       - Se o status retornado for "success", apresente os horários disponíveis de forma organizada.
-      - Se não houver horários disponíveis, sugira datas alternativas.
+      - Se não houver horários disponíveis, use buscar_proximos_horarios_disponiveis para sugerir datas alternativas.
+      - Se o status for "error", informe o erro ao usuário.
+    
+    - buscar_proximos_horarios_disponiveis: Use esta ferramenta para encontrar os próximos horários livres em vários dias de uma só vez (por exemplo, quando o dia desejado está cheio ou o cliente pergunta pelo próximo horário disponível). Você precisa da data inicial (formato YYYY-MM-DD), da duração em minutos, da quantidade de dias a verificar e do número máximo de horários.
+      - Não chame verificar_disponibilidade_agenda dia a dia para procurar alternativas; faça uma única chamada desta ferramenta.
+      - Se o status retornado for "success", apresente os horários agrupados por data.
       - Se o status for "error", informe o erro ao usuário.
     
     - registrar_manutencao_planilha: Use esta ferramenta para registrar um novo agendamento na planilha. Você precisa coletar todas as informações necessárias do cliente e do veículo antes de usar esta ferramenta.
@@ -460,13 +1439,23 @@ autoagenda_agent = Agent(
       - Se o status retornado for "success", confirme a criação do evento ao usuário.
       - Se o status for "error", informe o erro ao usuário, mas garanta que o registro na planilha foi feito.
     
+    - criar_eventos_agenda_em_lote: Use esta ferramenta quando for preciso criar vários eventos de uma vez (por exemplo, um cliente frotista agendando vários veículos). Envie todos os eventos em uma única chamada, em vez de chamar criar_evento_agenda várias vezes.
+      - O resultado traz "resultados" com o status de cada evento, na ordem enviada.
+      - Se o status for "partial", informe ao cliente quais eventos foram criados e quais falharam.
+      - Se o status for "error", informe o erro ao usuário.
+    
+    - agendar_manutencao: Use esta ferramenta para concluir um agendamento confirmado pelo cliente. Ela registra a manutenção na planilha e cria o evento no calendário ao mesmo tempo, em uma única chamada. Você precisa de todas as informações do cliente e do veículo, além da data, hora, duração e serviço.
+      - Prefira esta ferramenta a chamar registrar_manutencao_planilha e criar_evento_agenda separadamente.
+      - Se o status retornado for "success", confirme o agendamento completo ao cliente.
+      - Se o status for "partial", informe ao cliente o que foi concluído e o que falhou (veja "message" e os detalhes em "agenda" e "planilha"). "planilha na fila" significa que o registro será gravado em instantes e não é uma falha.
+      - Se o status for "error", informe o erro ao usuário.
+    
     Fluxo de trabalho recomendado para agendamento:
     1. Colete informações do cliente e do veículo
     2. Verifique a disponibilidade na agenda para a data desejada
     3. Confirme o horário escolhido com o cliente
-    4. Registre a manutenção na planilha
-    5. Crie o evento no calendário
-    6. Confirme o agendamento completo ao cliente
+    4. Use agendar_manutencao para registrar na planilha e criar o evento no calendário
+    5. Confirme o agendamento completo ao cliente
     
     Seja sempre cordial e profissional. Forneça informações claras e precisas.
     """,
@@ -474,29 +1463,101 @@ autoagenda_agent = Agent(
         buscar_historico_tool,
         registrar_manutencao_tool,
         verificar_disponibilidade_tool,
-        criar_evento_tool
+        buscar_proximos_horarios_tool,
+        criar_evento_tool,
+        criar_eventos_em_lote_tool,
+        agendar_manutencao_tool
     ],
+    before_model_callback=context_compactor,
 )
 
+# Sessões de todos os clientes, gravadas em disco e compartilhadas pelos runners
+session_service = open_session_service(
+    SESSION_DB_PATH,
+    max_sessions=SESSION_CACHE_MAX_SESSIONS,
+    idle_ttl_seconds=SESSION_IDLE_TTL_SECONDS
+)
+
+# Atalho para consultas de histórico por placa, consultado antes do runner
+plate_router = PlateIntentRouter(functools.partial(_call_tool, buscar_historico_cliente))
+
+async def _record_fast_path_turn(user_id: str, session_id: str, user_text: str, reply: str) -> None:
+    """
+    Grava na sessão uma troca respondida pelo atalho, para que o agente a veja nos próximos turnos.
+    """
+    session = await session_service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+    invocation_id = f"fastpath-{time.time_ns()}"
+    await session_service.append_event(session, Event(
+        author="user",
+        invocation_id=invocation_id,
+        content=types.Content(role="user", parts=[types.Part(text=user_text)])
+    ))
+    await session_service.append_event(session, Event(
+        author=autoagenda_agent.name,
+        invocation_id=invocation_id,
+        content=types.Content(role="model", parts=[types.Part(text=reply)])
+    ))
+
+async def _get_or_create_session(user_id: str, session_id: str):
+    session = await session_service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+    if session is None:
+        session = await session_service.create_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+    return session
+
 # Configuração do runner para execução do agente
-def get_runner():
+def get_runner(user_id: str = USER_ID, session_id: Optional[str] = None):
     """
-    Cria e retorna um runner para execução do agente.
+    Cria e retorna um runner para execução do agente, retomando a sessão do cliente se ela já existir.
     
+    Args:
+        user_id (str): Id do cliente.
+        session_id (str): Id da conversa do cliente (None = uma conversa nova, com id aleatório).
+        
     Returns:
-        Runner: Instância configurada do runner para o agente.
+        tuple: (Runner, Session) configurados para o agente.
     """
-    session_service = InMemorySessionService()
-    session = session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
-    runner =  Runner(agent=autoagenda_agent, app_name=APP_NAME, session_service=session_service)
+    if session_id is None:
+        session_id = uuid.uuid4().hex
+    session = asyncio.run(_get_or_create_session(user_id, session_id))
+    runner = Runner(agent=autoagenda_agent, app_name=APP_NAME, session_service=session_service)
     return runner, session
 
+def _event_text(event) -> str:
+    """
+    Extrai o texto de um evento do agente, considerando apenas as partes de texto.
+    
+    Partes de chamada/resposta de ferramenta e pensamentos do modelo são ignoradas
+    pela estrutura do evento (em vez de acessar ``.text`` da resposta, que gera avisos).
+    """
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text and not part.thought)
+
+def configure_console_logging(level: str = LIBRARY_LOG_LEVEL) -> None:
+    """
+    Configura o logging do modo interativo: avisos das bibliotecas (ADK, genai, HTTP)
+    só aparecem a partir de ``level``, em vez de poluir o console.
+    
+    Args:
+        level (str): Nível mínimo dos logs das bibliotecas (ex.: 'ERROR', 'WARNING', 'DEBUG').
+    """
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # Avisos do módulo warnings (ex.: recursos experimentais do ADK) passam pelo logging
+    logging.captureWarnings(True)
+    for name in ("google_adk", "google_genai", "google.auth", "googleapiclient", "httpx", "py.warnings"):
+        logging.getLogger(name).setLevel(level.upper())
+
 # Função principal para executar o agente em modo interativo
-def run_interactive():
+def run_interactive(user_id: str = USER_ID, session_id: Optional[str] = None):
     """
     Executa o agente em modo interativo via console.
+    
+    Args:
+        user_id (str): Id do cliente.
+        session_id (str): Id de uma conversa a retomar (None = uma conversa nova a cada execução).
     """
-    runner, session = get_runner()
+    configure_console_logging()
+    runner, session = get_runner(user_id, session_id)
 
     print("=" * 50)
     print("   AutoAgenda - Agente de Agendamento de Manutenção   ")
@@ -504,6 +1565,7 @@ def run_interactive():
     print("\nOlá! Como posso ajudar com o agendamento ou verificação do histórico do seu veículo hoje?")
     print("Exemplos: 'Qual o histórico da placa ABC1234?', 'Agendar troca de óleo para amanhã'.")
     print("Digite 'sair' a qualquer momento para encerrar.")
+    print(f"Conversa: {session.id} (para retomá-la, execute com --sessao {session.id})")
     print("-" * 50)
     
     while True:
@@ -512,56 +1574,72 @@ def run_interactive():
             print("\nAgente: Entendido. Até logo!")
             break
         
+        # Consultas de histórico por placa são respondidas sem passar pelo modelo
+        if INTENT_ROUTER_ENABLED:
+            reply = plate_router.route(user_input)
+            if reply is not None:
+                try:
+                    asyncio.run(_record_fast_path_turn(session.user_id, session.id, user_input, reply))
+                except Exception as e:
+                    print(f"Erro ao gravar a resposta na sessão: {e}")
+                print(f"\nAgente: {reply}")
+                continue
+        
         print("Agente: Processando...", end="\r")  # Use \r para sobrescrever a linha
         content = types.Content(role="user", parts=[types.Part(text=user_input)])
         final_response = ""
+        turn_started = time.monotonic()
+        first_token_at = None
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE if STREAMING_ENABLED else StreamingMode.NONE)
         
         try:
-            # Captura a saída padrão e de erro temporariamente para suprimir mensagens
-            import sys
-            import io
-            original_stdout = sys.stdout
-            original_stderr = sys.stderr
-            sys.stdout = io.StringIO()
-            sys.stderr = io.StringIO()
-            
-            # Itera assincronamente pelos eventos retornados durante a execução do agente
-            for event in runner.run(user_id=USER_ID, session_id=SESSION_ID, new_message=content):
+            # Itera pelos eventos retornados durante a execução do agente
+            for event in runner.run(user_id=session.user_id, session_id=session.id, new_message=content, run_config=run_config):
+                # Trechos parciais (streaming) são impressos na hora
+                if event.partial:
+                    chunk = _event_text(event)
+                    if chunk:
+                        if first_token_at is None:
+                            first_token_at = time.monotonic()
+                            print(" " * 30, end="\r")  # Limpa a linha "Processando..."
+                            print("\nAgente: ", end="")
+                        print(chunk, end="", flush=True)
+                    continue
                 if event.is_final_response():
-                    for part in event.content.parts:
-                        if part.text is not None:
-                            final_response += part.text
-                            final_response += "\n"
-            
-            # Restaura stdout e stderr
-            sys.stdout = original_stdout
-            sys.stderr = original_stderr
-            
+                    final_response += _event_text(event)
+            plate_router.record_agent_turn(time.monotonic() - turn_started)
         except Exception as e:
-            # Restaura stdout e stderr em caso de exceção
-            try:
-                sys.stdout = original_stdout
-                sys.stderr = original_stderr
-            except:
-                pass
-                
             # Captura erros na execução do agente e continua
+            logger.debug("Erro na execução do agente", exc_info=True)
             print(f"Erro interno: {str(e)}")
             final_response = "Desculpe, ocorreu um erro interno. Por favor, tente novamente."
-
-        # Filtra mensagens de erro específicas relacionadas a valores padrão
-        if "Default value is not supported in function declaration schema for Google AI" in final_response:
-            final_response = final_response.replace("Default value is not supported in function declaration schema for Google AI.", "")
+            first_token_at = None
         
-        # Filtra mensagens de aviso sobre partes não textuais na resposta
-        warning_text = "Warning: there are non-text parts in the response: ['function_call'],returning concatenated text result from text parts,check out the non text parts for full response from model."
-        if warning_text in final_response:
-            final_response = final_response.replace(warning_text, "")
+        turn_ms = (time.monotonic() - turn_started) * 1000
+        if first_token_at is not None:
+            # A resposta já foi impressa durante o streaming
+            print(f"\n[primeiro token: {(first_token_at - turn_started) * 1000:.0f} ms | turno: {turn_ms:.0f} ms]")
+            continue
         
         # Limpa a linha de processamento e imprime a resposta final
         print(" " * 30, end="\r")  # Limpa a linha "Processando..."
         print(f"\nAgente: {final_response.strip()}")
+        print(f"[turno: {turn_ms:.0f} ms]")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Ponto de entrada da linha de comando: inicia uma conversa nova ou retoma uma com ``--sessao``.
+    
+    Args:
+        argv (list): Argumentos da linha de comando (None = ``sys.argv``).
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description="AutoAgenda - agente de agendamento de manutenção (modo interativo)")
+    parser.add_argument("--sessao", help="id de uma conversa gravada a retomar (padrão: uma conversa nova)")
+    parser.add_argument("--cliente", default=USER_ID, help=f"id do cliente (padrão: {USER_ID})")
+    args = parser.parse_args(argv)
+    run_interactive(user_id=args.cliente, session_id=args.sessao)
 
-# Ponto de entrada para execução direta do script
+# Ponto de entrada para ``python -m autoagenda_adk.agent`` (``python agent.py`` é tratado no início do módulo)
 if __name__ == "__main__":
-    run_interactive()
+    main()
@@ -0,0 +1,81 @@
+"""
+Documento de discovery do Google Calendar carregado localmente (modo estático).
+
+O cliente do Calendar é montado a partir do documento de discovery
+``calendar v3``. Em vez de deixar ``build()`` localizar e interpretar o JSON a
+cada cliente criado (ou, em versões/configurações antigas, baixá-lo pela rede),
+o documento é lido uma única vez de um arquivo local, interpretado e mantido
+em memória; cada cliente é criado com ``build_from_document``, sem rede.
+
+Origem do documento, em ordem de preferência:
+    1. Arquivo apontado por ``CALENDAR_DISCOVERY_PATH`` (cópia fixada junto com a imagem).
+    2. Cópia estática distribuída com o ``google-api-python-client``.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+# Cópia fixada do documento de discovery (opcional)
+CALENDAR_DISCOVERY_PATH = os.environ.get('CALENDAR_DISCOVERY_PATH', '')
+
+# Estatísticas da carga do documento (origem e tempo gasto)
+discovery_stats: Dict[str, Any] = {"source": None, "load_ms": None, "clients_built": 0}
+
+_document: Optional[Dict[str, Any]] = None
+_lock = threading.Lock()
+
+
+def get_calendar_discovery_document() -> Dict[str, Any]:
+    """
+    Retorna o documento de discovery do Calendar já interpretado, carregando-o na primeira chamada.
+
+    Returns:
+        dict: Documento de discovery ``calendar v3``.
+
+    Raises:
+        FileNotFoundError: Se nenhuma cópia local do documento estiver disponível.
+    """
+    global _document
+    with _lock:
+        if _document is None:
+            started = time.perf_counter()
+            if CALENDAR_DISCOVERY_PATH:
+                with open(CALENDAR_DISCOVERY_PATH, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                source = CALENDAR_DISCOVERY_PATH
+            else:
+                content = discovery_cache.get_static_doc('calendar', 'v3')
+                if content is None:
+                    raise FileNotFoundError("Documento de discovery estático do Calendar v3 não encontrado.")
+                source = 'googleapiclient (static)'
+            _document = json.loads(content)
+            discovery_stats["source"] = source
+            discovery_stats["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return _document
+
+
+def build_calendar_service(credentials=None, http=None):
+    """
+    Cria um cliente do Google Calendar a partir do documento de discovery local.
+
+    Args:
+        credentials: Credenciais usadas pelo cliente (ignoradas se ``http`` for informado).
+        http: Objeto HTTP já autorizado (opcional).
+
+    Returns:
+        Resource: Serviço do Google Calendar.
+    """
+    service = build_from_document(
+        get_calendar_discovery_document(),
+        credentials=None if http is not None else credentials,
+        http=http,
+    )
+    with _lock:
+        discovery_stats["clients_built"] += 1
+    return service
@@ -0,0 +1,253 @@
+"""
+Espelho local de um calendário do Google Calendar, mantido por sincronização incremental.
+
+Em vez de chamar ``freebusy().query`` a cada pergunta de disponibilidade, os
+eventos do calendário são copiados para um ``CalendarEventStore`` em memória
+(indexado por dia) e mantidos atualizados com ``events().list(syncToken=...)``,
+que retorna apenas o que mudou desde a última sincronização. As consultas de
+horários ocupados passam a ser respondidas localmente.
+
+Quando o token de sincronização expira (HTTP 410 GONE), uma sincronização
+completa é feita. Ela é montada em um espelho novo, que substitui o atual de
+uma só vez ao final: leitores concorrentes nunca veem um espelho vazio ou
+pela metade.
+"""
+
+import datetime
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from .slots import Interval, merge_intervals, parse_iso_datetime
+
+
+class CalendarEventStore:
+    """
+    Eventos ocupados do calendário, indexados pelo dia (no fuso horário local).
+    """
+
+    def __init__(self, tz):
+        """
+        Args:
+            tz: Fuso horário (pytz) usado para agrupar os eventos por dia.
+        """
+        self.tz = tz
+        self._events: Dict[str, Tuple[Interval, List[datetime.date]]] = {}
+        self._by_day: Dict[datetime.date, Dict[str, Interval]] = {}
+        # Eventos aplicados durante uma reconstrução, reaplicados no espelho novo
+        self._rebuild_log: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        """
+        Insere, atualiza ou remove um evento conforme o recurso retornado pela API.
+
+        Eventos cancelados ou marcados como "disponível" (transparent) são removidos.
+
+        Args:
+            event (dict): Recurso de evento do Google Calendar.
+        """
+        with self._lock:
+            if self._rebuild_log is not None:
+                self._rebuild_log.append(event)
+            self._remove(event['id'])
+            if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+                return
+            interval = self._event_interval(event)
+            if interval is None:
+                return
+            days = self._days_covered(interval)
+            self._events[event['id']] = (interval, days)
+            for day in days:
+                self._by_day.setdefault(day, {})[event['id']] = interval
+
+    def begin_rebuild(self) -> "CalendarEventStore":
+        """
+        Inicia a reconstrução do espelho: o conteúdo atual continua sendo servido e
+        os eventos aplicados a partir de agora são registrados para ``finish_rebuild``.
+
+        Returns:
+            CalendarEventStore: Espelho vazio a ser preenchido pela sincronização completa.
+        """
+        with self._lock:
+            self._rebuild_log = []
+        return CalendarEventStore(self.tz)
+
+    def finish_rebuild(self, fresh: "CalendarEventStore") -> None:
+        """
+        Substitui atomicamente o conteúdo pelo de ``fresh``, reaplicando os eventos
+        gravados localmente (ex.: write-through do agente) durante a reconstrução.
+
+        Args:
+            fresh (CalendarEventStore): Espelho retornado por ``begin_rebuild`` e já preenchido.
+        """
+        with self._lock:
+            for event in self._rebuild_log or []:
+                fresh.apply(event)
+            self._events, self._by_day = fresh._events, fresh._by_day
+            self._rebuild_log = None
+
+    def abort_rebuild(self) -> None:
+        """
+        Encerra uma reconstrução que falhou, mantendo o conteúdo atual.
+        """
+        with self._lock:
+            self._rebuild_log = None
+
+    def clear(self) -> None:
+        """
+        Remove todos os eventos do espelho.
+        """
+        with self._lock:
+            self._events.clear()
+            self._by_day.clear()
+
+    def busy_intervals(self, time_min: datetime.datetime, time_max: datetime.datetime) -> List[Interval]:
+        """
+        Retorna os intervalos ocupados (mesclados) que se sobrepõem à janela.
+
+        Args:
+            time_min (datetime): Início da janela (com fuso horário).
+            time_max (datetime): Fim da janela (com fuso horário).
+
+        Returns:
+            list: Intervalos ocupados mesclados.
+        """
+        first_day = time_min.astimezone(self.tz).date()
+        last_day = time_max.astimezone(self.tz).date()
+        found: Dict[str, Interval] = {}
+        with self._lock:
+            day = first_day
+            while day <= last_day:
+                found.update(self._by_day.get(day, {}))
+                day += datetime.timedelta(days=1)
+        return merge_intervals(
+            (start, end) for start, end in found.values() if start < time_max and end > time_min
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._events)
+
+    def _remove(self, event_id: str) -> None:
+        previous = self._events.pop(event_id, None)
+        if previous is None:
+            return
+        for day in previous[1]:
+            bucket = self._by_day.get(day)
+            if bucket is not None:
+                bucket.pop(event_id, None)
+                if not bucket:
+                    del self._by_day[day]
+
+    def _event_interval(self, event: Dict[str, Any]) -> Optional[Interval]:
+        start = event.get('start', {})
+        end = event.get('end', {})
+        if 'dateTime' in start and 'dateTime' in end:
+            return parse_iso_datetime(start['dateTime']), parse_iso_datetime(end['dateTime'])
+        if 'date' in start and 'date' in end:
+            # Evento de dia inteiro: da meia-noite local do início até a do fim
+            return (
+                self.tz.localize(datetime.datetime.combine(datetime.date.fromisoformat(start['date']), datetime.time())),
+                self.tz.localize(datetime.datetime.combine(datetime.date.fromisoformat(end['date']), datetime.time())),
+            )
+        return None
+
+    def _days_covered(self, interval: Interval) -> List[datetime.date]:
+        start, end = interval
+        first_day = start.astimezone(self.tz).date()
+        last_day = (end - datetime.timedelta(microseconds=1)).astimezone(self.tz).date()
+        days = []
+        day = first_day
+        while day <= last_day:
+            days.append(day)
+            day += datetime.timedelta(days=1)
+        return days
+
+
+class CalendarSync:
+    """
+    Mantém um ``CalendarEventStore`` sincronizado com um calendário via syncToken.
+    """
+
+    def __init__(self, store: CalendarEventStore, calendar_id: str = 'primary', max_staleness_seconds: float = 30.0):
+        """
+        Args:
+            store (CalendarEventStore): Espelho local a ser mantido.
+            calendar_id (str): Id do calendário sincronizado.
+            max_staleness_seconds (float): Idade máxima do espelho antes de uma nova sincronização.
+        """
+        self.store = store
+        self.calendar_id = calendar_id
+        self.max_staleness_seconds = max_staleness_seconds
+        self.stats = {"full_syncs": 0, "incremental_syncs": 0, "token_expired": 0, "events_received": 0}
+        self._sync_token: Optional[str] = None
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def ensure_fresh(self, calendar_service) -> None:
+        """
+        Sincroniza o espelho se ele estiver mais velho que ``max_staleness_seconds``.
+
+        Args:
+            calendar_service: Serviço do Google Calendar.
+        """
+        with self._lock:
+            if self._synced_at is not None and time.monotonic() - self._synced_at < self.max_staleness_seconds:
+                return
+            self._sync(calendar_service)
+
+    def sync(self, calendar_service) -> None:
+        """
+        Sincroniza o espelho imediatamente (incremental se houver token).
+
+        Args:
+            calendar_service: Serviço do Google Calendar.
+        """
+        with self._lock:
+            self._sync(calendar_service)
+
+    def _sync(self, calendar_service) -> None:
+        if self._sync_token is not None:
+            try:
+                self._sync_token = self._list_all(calendar_service, sync_token=self._sync_token)
+                self.stats["incremental_syncs"] += 1
+                self._synced_at = time.monotonic()
+                return
+            except HttpError as e:
+                if e.resp.status != 410:
+                    raise
+                # Token expirado: descarta o espelho e refaz a sincronização completa
+                self.stats["token_expired"] += 1
+
+        # Sincronização completa em um espelho novo, trocado de uma só vez no final
+        fresh = self.store.begin_rebuild()
+        try:
+            sync_token = self._list_all(calendar_service, sync_token=None, store=fresh)
+        except Exception:
+            self.store.abort_rebuild()
+            raise
+        self.store.finish_rebuild(fresh)
+        self._sync_token = sync_token
+        self.stats["full_syncs"] += 1
+        self._synced_at = time.monotonic()
+
+    def _list_all(self, calendar_service, sync_token: Optional[str],
+                  store: Optional[CalendarEventStore] = None) -> Optional[str]:
+        store = store if store is not None else self.store
+        page_token = None
+        while True:
+            params = {"calendarId": self.calendar_id, "singleEvents": True, "showDeleted": True}
+            if sync_token is not None:
+                params["syncToken"] = sync_token
+            if page_token is not None:
+                params["pageToken"] = page_token
+            response = calendar_service.events().list(**params).execute()
+            for event in response.get('items', []):
+                store.apply(event)
+                self.stats["events_received"] += 1
+            page_token = response.get('nextPageToken')
+            if page_token is None:
+                return response.get('nextSyncToken')
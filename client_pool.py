@@ -0,0 +1,134 @@
+"""
+Pool de clientes das APIs do Google para uso concorrente.
+
+O cliente do Calendar (googleapiclient sobre httplib2) não é thread-safe: duas
+threads usando o mesmo objeto podem corromper a conexão. Em vez de serializar
+todas as chamadas em um único cliente, ``ClientPool`` mantém até ``max_size``
+clientes, cada um com a sua conexão keep-alive, e os empresta com ``lease()``
+a uma thread por vez. Os clientes são criados sob demanda e devolvidos ao pool
+depois do uso, de modo que chamadas seguintes reaproveitam conexões TLS já
+abertas.
+
+Para o Google Sheets, o gspread usa uma ``requests.Session``, que pode ser
+compartilhada entre threads; ``mount_pooled_adapter`` apenas dimensiona o pool
+de conexões do urllib3 dessa sessão.
+"""
+
+import contextlib
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ClientPool:
+    """
+    Empresta clientes criados por ``factory`` a uma thread por vez, com no máximo ``max_size`` clientes.
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_size: int = 8):
+        """
+        Args:
+            factory (callable): Função sem argumentos que cria um novo cliente.
+            max_size (int): Número máximo de clientes (e conexões) simultâneos.
+        """
+        if max_size < 1:
+            raise ValueError("O pool precisa de ao menos um cliente.")
+        self.factory = factory
+        self.max_size = max_size
+        self.stats = {"created": 0, "leases": 0, "waits": 0}
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Empresta um cliente para uso exclusivo dentro do bloco ``with``.
+
+        Reaproveita o cliente ocioso usado mais recentemente (conexão mais
+        provavelmente ainda aberta), cria um novo se o pool ainda não estiver
+        cheio, ou espera a devolução de outro.
+
+        Args:
+            timeout (float): Tempo máximo de espera por um cliente livre (None = sem limite).
+
+        Yields:
+            Cliente emprestado.
+
+        Raises:
+            queue.Empty: Se nenhum cliente for devolvido dentro de ``timeout``.
+        """
+        client = self._acquire(timeout)
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
+
+    def _acquire(self, timeout: Optional[float]) -> Any:
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            client = None
+        if client is None:
+            with self._lock:
+                create = self._created < self.max_size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    client = self.factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                with self._lock:
+                    self.stats["created"] += 1
+            else:
+                with self._lock:
+                    self.stats["waits"] += 1
+                client = self._idle.get(timeout=timeout)
+        with self._lock:
+            self.stats["leases"] += 1
+        return client
+
+
+def mount_pooled_adapter(session: requests.Session, pool_size: int) -> HTTPAdapter:
+    """
+    Dimensiona o pool de conexões keep-alive de uma sessão ``requests`` compartilhada entre threads.
+
+    Args:
+        session (requests.Session): Sessão usada pelo cliente (ex.: ``gc.http_client.session``).
+        pool_size (int): Número máximo de conexões mantidas por host.
+
+    Returns:
+        HTTPAdapter: Adaptador montado para ``https://``.
+    """
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+    session.mount("https://", adapter)
+    return adapter
+
+
+def adapter_stats(adapter: HTTPAdapter) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Resume o estado dos pools de conexão de um ``HTTPAdapter``.
+
+    Args:
+        adapter (HTTPAdapter): Adaptador retornado por ``mount_pooled_adapter``.
+
+    Returns:
+        dict: Para cada host, o total de conexões criadas e de requisições feitas.
+    """
+    hosts = []
+    for key in list(adapter.poolmanager.pools.keys()):
+        pool = adapter.poolmanager.pools.get(key)
+        if pool is None:
+            continue
+        hosts.append({
+            "host": pool.host,
+            "connections_created": pool.num_connections,
+            "requests": pool.num_requests,
+        })
+    return {"hosts": hosts}
@@ -0,0 +1,291 @@
+"""
+Compactação do histórico da conversa enviado ao modelo a cada turno.
+
+O ADK envia ao Gemini todo o histórico da sessão, inclusive os resultados
+brutos das ferramentas, então o custo e a latência de cada turno crescem com
+a conversa. ``ContextCompactor`` é usado como ``before_model_callback`` do
+agente e, quando a estimativa de tokens da requisição passa de
+``token_budget``:
+
+1. encurta os resultados de ferramentas dos turnos anteriores (o turno atual
+   fica intacto, pois o modelo ainda está trabalhando com eles);
+2. se ainda estiver acima do orçamento, remove os turnos mais antigos, que são
+   substituídos por uma nota com as mensagens do cliente resumidas. A nota
+   traz apenas as ``note_max_messages`` mensagens mais recentes, dentro de uma
+   fração fixa do orçamento (``note_budget_share``), e a contagem das demais:
+   o tamanho da requisição não cresce com a conversa;
+3. se o turno atual sozinho passar do orçamento, a nota é retirada e as maiores
+   partes (textos e resultados de ferramentas) são encurtadas até caber.
+
+Um turno começa em cada mensagem de texto do cliente, de modo que chamadas de
+ferramentas e suas respostas nunca são separadas. Apenas a requisição é
+alterada: a sessão gravada mantém o histórico completo.
+
+Os tokens são estimados pelo tamanho do texto (``CHARS_PER_TOKEN`` caracteres
+por token), sem chamar a API.
+"""
+
+import json
+import threading
+from typing import Any, List, Optional
+
+from google.genai import types
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(contents: List[types.Content]) -> int:
+    """
+    Estima o número de tokens de uma lista de conteúdos.
+
+    Args:
+        contents (list): Conteúdos da requisição ao modelo.
+
+    Returns:
+        int: Estimativa de tokens.
+    """
+    return _count_chars(contents) // CHARS_PER_TOKEN
+
+
+def split_turns(contents: List[types.Content]) -> List[List[types.Content]]:
+    """
+    Agrupa os conteúdos em turnos, cada um iniciado por uma mensagem de texto do cliente.
+
+    Conteúdos anteriores à primeira mensagem do cliente formam o primeiro grupo.
+
+    Args:
+        contents (list): Conteúdos da requisição ao modelo.
+
+    Returns:
+        list: Listas de conteúdos, na ordem original.
+    """
+    turns: List[List[types.Content]] = []
+    for content in contents:
+        if not turns or _is_user_message(content):
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+class ContextCompactor:
+    """
+    ``before_model_callback`` que limita o tamanho do histórico enviado ao modelo.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 8000,
+        tool_result_max_chars: int = 1500,
+        note_max_chars: int = 120,
+        note_max_messages: int = 10,
+        note_budget_share: float = 0.25,
+    ):
+        """
+        Args:
+            token_budget (int): Tokens estimados a partir dos quais o histórico é compactado.
+            tool_result_max_chars (int): Tamanho máximo de um resultado de ferramenta de turnos anteriores.
+            note_max_chars (int): Tamanho máximo de cada mensagem do cliente na nota de turnos removidos.
+            note_max_messages (int): Número máximo de mensagens do cliente (as mais recentes) na nota.
+            note_budget_share (float): Fração máxima do orçamento ocupada pela nota.
+        """
+        self.token_budget = token_budget
+        self.tool_result_max_chars = tool_result_max_chars
+        self.note_max_chars = note_max_chars
+        self.note_max_messages = note_max_messages
+        self.note_budget_share = note_budget_share
+        self.stats = {
+            "requests": 0,
+            "compacted": 0,
+            "tool_results_trimmed": 0,
+            "turns_dropped": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+        }
+        self._lock = threading.Lock()
+
+    def __call__(self, callback_context, llm_request) -> None:
+        """
+        Compacta ``llm_request.contents`` no lugar. Retorna None para que a chamada ao modelo prossiga.
+        """
+        before = estimate_tokens(llm_request.contents)
+        trimmed = dropped = 0
+        if before > self.token_budget:
+            llm_request.contents, trimmed, dropped = self.compact(llm_request.contents)
+        after = estimate_tokens(llm_request.contents) if before > self.token_budget else before
+
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["tokens_before"] += before
+            self.stats["tokens_after"] += after
+            if after < before:
+                self.stats["compacted"] += 1
+            self.stats["tool_results_trimmed"] += trimmed
+            self.stats["turns_dropped"] += dropped
+        return None
+
+    def compact(self, contents: List[types.Content]):
+        """
+        Reduz os conteúdos ao orçamento de tokens (sempre preservando o turno atual).
+
+        Args:
+            contents (list): Conteúdos da requisição ao modelo.
+
+        Returns:
+            tuple: (conteúdos compactados, partes encurtadas, turnos removidos).
+        """
+        turns = split_turns(contents)
+        current = turns.pop() if turns else []
+
+        # 1. Encurta os resultados de ferramentas dos turnos anteriores
+        trimmed = 0
+        compacted_turns = []
+        for turn in turns:
+            new_turn = []
+            for content in turn:
+                new_content, count = self._trim_tool_results(content)
+                new_turn.append(new_content)
+                trimmed += count
+            compacted_turns.append(new_turn)
+
+        # 2. Remove os turnos mais antigos até caber no orçamento (a nota tem tamanho limitado)
+        turn_chars = [_count_chars(turn) for turn in compacted_turns]
+        remaining = sum(turn_chars) + _count_chars(current)
+        dropped = 0
+        note: List[types.Content] = []
+        while dropped < len(compacted_turns) and (remaining + _count_chars(note)) // CHARS_PER_TOKEN > self.token_budget:
+            remaining -= turn_chars[dropped]
+            dropped += 1
+            note = self._note(compacted_turns[:dropped])
+        result = note + [content for turn in compacted_turns[dropped:] for content in turn] + list(current)
+
+        # 3. O turno atual sozinho passa do orçamento: sem nota e com as maiores partes encurtadas
+        if estimate_tokens(result) > self.token_budget:
+            result, shortened = self._shrink(list(current))
+            trimmed += shortened
+        return result, trimmed, dropped
+
+    def compaction_ratio(self) -> Optional[float]:
+        """
+        Returns:
+            float: Tokens enviados / tokens originais acumulados (1.0 = sem compactação), ou None sem requisições.
+        """
+        with self._lock:
+            if not self.stats["tokens_before"]:
+                return None
+            return self.stats["tokens_after"] / self.stats["tokens_before"]
+
+    def _note(self, dropped: List[List[types.Content]]) -> List[types.Content]:
+        """
+        Monta a nota dos turnos removidos, com as mensagens mais recentes do cliente que
+        cabem em ``note_max_messages`` e em ``note_budget_share`` do orçamento.
+        """
+        max_chars = int(self.token_budget * self.note_budget_share) * CHARS_PER_TOKEN
+        header = (
+            f"[Histórico compactado: {len(dropped)} turno(s) anteriores foram omitidos. "
+            "Últimas mensagens do cliente nesses turnos:]"
+        )
+        messages: List[str] = []
+        used = len(header)
+        for turn in reversed(dropped):
+            if len(messages) >= self.note_max_messages:
+                break
+            text = " ".join(
+                part.text for content in turn if _is_user_message(content) for part in content.parts if part.text
+            ).strip()
+            if not text:
+                continue
+            if len(text) > self.note_max_chars:
+                text = text[:self.note_max_chars] + "..."
+            line = f"- {text}"
+            # Reserva espaço para a linha com a contagem de turnos omitidos
+            if used + len(line) + 64 > max_chars:
+                break
+            messages.append(line)
+            used += len(line) + 1
+        omitted = len(dropped) - len(messages)
+        lines = [header]
+        if omitted:
+            lines.append(f"(+{omitted} turno(s) mais antigos omitidos)")
+        lines.extend(reversed(messages))
+        return [types.Content(role="user", parts=[types.Part(text="\n".join(lines))])]
+
+    def _shrink(self, contents: List[types.Content]):
+        """
+        Encurta pela metade, repetidamente, a maior parte (texto ou resultado de ferramenta)
+        até a estimativa caber no orçamento.
+        """
+        contents = [types.Content(role=content.role, parts=list(content.parts or [])) for content in contents]
+        shortened = 0
+        while estimate_tokens(contents) > self.token_budget:
+            size, i, j = max(
+                ((_count_part_chars(part), i, j)
+                 for i, content in enumerate(contents)
+                 for j, part in enumerate(content.parts)
+                 if part.text or part.function_response),
+                default=(0, -1, -1),
+            )
+            if size <= 32:
+                # Só restam chamadas de função e partes mínimas: nada mais a encurtar
+                break
+            contents[i].parts[j] = _shorten(contents[i].parts[j], size // 2)
+            shortened += 1
+        return contents, shortened
+
+    def _trim_tool_results(self, content: types.Content):
+        count = 0
+        parts = []
+        for part in content.parts or []:
+            response = part.function_response
+            if response is not None:
+                serialized = _dump(response.response)
+                if len(serialized) > self.tool_result_max_chars:
+                    part = types.Part(function_response=types.FunctionResponse(
+                        id=response.id,
+                        name=response.name,
+                        response={"resumo": serialized[:self.tool_result_max_chars] + "...", "truncado": True},
+                    ))
+                    count += 1
+            parts.append(part)
+        if not count:
+            return content, 0
+        return types.Content(role=content.role, parts=parts), count
+
+
+def _count_part_chars(part: types.Part) -> int:
+    chars = 0
+    if part.text:
+        chars += len(part.text)
+    if part.function_call:
+        chars += len(part.function_call.name or '') + len(_dump(part.function_call.args))
+    if part.function_response:
+        chars += len(part.function_response.name or '') + len(_dump(part.function_response.response))
+    return chars
+
+
+def _count_chars(contents: List[types.Content]) -> int:
+    return sum(_count_part_chars(part) for content in contents for part in content.parts or [])
+
+
+def _shorten(part: types.Part, max_chars: int) -> types.Part:
+    # O texto de origem sempre diminui (ao menos pela metade), mesmo que o escape do JSON o aumente
+    if part.function_response is None:
+        return types.Part(text=part.text[:min(max_chars, len(part.text) // 2)] + "...")
+    response = part.function_response
+    payload = response.response or {}
+    # Um resultado já encurtado é reduzido a partir do resumo, sem serializá-lo de novo
+    text = payload["resumo"] if payload.get("truncado") else _dump(payload)
+    return types.Part(function_response=types.FunctionResponse(
+        id=response.id,
+        name=response.name,
+        response={"resumo": text[:min(max_chars, len(text) // 2)] + "...", "truncado": True},
+    ))
+
+
+def _is_user_message(content: types.Content) -> bool:
+    return content.role == "user" and any(part.text for part in content.parts or [])
+
+
+def _dump(value: Any) -> str:
+    if value is None:
+        return ""
+    return json.dumps(value, ensure_ascii=False, default=str)
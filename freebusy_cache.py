@@ -0,0 +1,100 @@
+"""
+Cache, por calendário e data, dos intervalos ocupados da agenda (resultado do freebusy).
+
+Clientes costumam perguntar várias vezes pela mesma data numa conversa. O
+resultado do ``freebusy().query`` é guardado por calendário (box) e dia
+durante ``ttl_seconds`` (curto, para acompanhar eventos criados fora do
+agente) e atualizado na hora (write-through) quando o próprio agente cria um
+evento, para que uma resposta em cache nunca ofereça um horário que acabou de
+ser reservado.
+"""
+
+import datetime
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .slots import Interval, merge_intervals
+
+
+class FreeBusyCache:
+    """
+    Guarda os intervalos ocupados (já mesclados) de cada calendário em cada dia, com expiração.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0):
+        """
+        Args:
+            ttl_seconds (float): Tempo em segundos que o resultado de um dia permanece válido.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "write_through": 0, "invalidations": 0}
+        self._entries: Dict[Tuple[str, datetime.date], Tuple[float, List[Interval]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, calendar_id: str, day: datetime.date) -> Optional[List[Interval]]:
+        """
+        Retorna os intervalos ocupados do calendário no dia, se estiverem em cache e válidos.
+
+        Args:
+            calendar_id (str): Id do calendário.
+            day (datetime.date): Dia consultado.
+
+        Returns:
+            list: Intervalos ocupados mesclados ou None (cache miss).
+        """
+        with self._lock:
+            entry = self._entries.get((calendar_id, day))
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self.stats["hits"] += 1
+                return list(entry[1])
+            self._entries.pop((calendar_id, day), None)
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, calendar_id: str, day: datetime.date, intervals: Iterable[Interval]) -> None:
+        """
+        Guarda os intervalos ocupados de um calendário em um dia recém-consultado.
+
+        Args:
+            calendar_id (str): Id do calendário.
+            day (datetime.date): Dia consultado.
+            intervals (iterable): Intervalos ocupados do dia.
+        """
+        merged = merge_intervals(intervals)
+        with self._lock:
+            self._entries[(calendar_id, day)] = (time.monotonic(), merged)
+
+    def add_busy(self, calendar_id: str, day: datetime.date, interval: Interval) -> None:
+        """
+        Acrescenta um intervalo recém-reservado ao dia em cache (write-through).
+
+        Se o dia não estiver em cache, nada é feito: a próxima consulta buscará
+        o estado atualizado na API.
+
+        Args:
+            calendar_id (str): Id do calendário onde o evento foi criado.
+            day (datetime.date): Dia do evento criado.
+            interval (tuple): (início, fim) do evento, com fuso horário.
+        """
+        with self._lock:
+            entry = self._entries.get((calendar_id, day))
+            if entry is None:
+                return
+            self._entries[(calendar_id, day)] = (entry[0], merge_intervals(entry[1] + [interval]))
+            self.stats["write_through"] += 1
+
+    def invalidate(self, day: Optional[datetime.date] = None) -> None:
+        """
+        Descarta o cache de um dia em todos os calendários (ou tudo, se ``day`` for None).
+
+        Args:
+            day (datetime.date): Dia a ser descartado.
+        """
+        with self._lock:
+            if day is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[1] == day]:
+                    del self._entries[key]
+            self.stats["invalidations"] += 1
@@ -0,0 +1,141 @@
+"""
+Índice em memória do histórico de manutenção, indexado pela placa do veículo.
+
+Evita que cada consulta de histórico baixe e percorra a planilha inteira: o
+índice é construído uma vez a partir dos registros da planilha e as consultas
+passam a ser um acesso direto ao dicionário (O(1) por placa).
+
+Política de atualização:
+    - O índice expira após ``ttl_seconds`` e é atualizado na próxima consulta
+      (de forma incremental, veja ``history_sync.HistorySync``).
+    - Qualquer escrita feita pelo próprio agente (``registrar_manutencao_planilha``)
+      invalida o índice, para que o novo registro apareça na consulta seguinte.
+    - ``invalidate()`` pode ser chamado manualmente para forçar a atualização.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Cabeçalhos das colunas usadas pelo histórico
+PLATE_COLUMN_HEADER = 'placa_veiculo'
+DATE_COLUMN_HEADER = 'data_agendamento'
+KM_COLUMN_HEADER = 'km_atual'
+SERVICE_COLUMN_HEADER = 'servico_realizado'
+NOTES_COLUMN_HEADER = 'observacoes'
+
+
+def normalize_plate(placa_veiculo: Any) -> str:
+    """
+    Normaliza a placa para comparação: maiúsculas, sem hífen e sem espaços.
+
+    Assim "abc-1234", "ABC 1234" e "ABC1234" são a mesma placa.
+
+    Args:
+        placa_veiculo: Placa do veículo como veio da planilha ou do usuário.
+
+    Returns:
+        str: Placa normalizada.
+    """
+    return ''.join(char for char in str(placa_veiculo).upper() if char not in '- \t')
+
+
+def record_to_entry(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converte um registro da planilha para a entrada de histórico retornada ao agente.
+
+    Args:
+        record (dict): Registro da planilha (cabeçalho -> valor).
+
+    Returns:
+        dict: Entrada de histórico com Data, KM, Servico e Observacoes.
+    """
+    return {
+        "Data": record.get(DATE_COLUMN_HEADER, "N/A"),
+        "KM": record.get(KM_COLUMN_HEADER, "N/A"),
+        "Servico": record.get(SERVICE_COLUMN_HEADER, "N/A"),
+        "Observacoes": record.get(NOTES_COLUMN_HEADER, "")
+    }
+
+
+class HistoryIndex:
+    """
+    Índice placa normalizada -> lista de entradas de histórico, na ordem da planilha.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0):
+        """
+        Args:
+            ttl_seconds (float): Tempo em segundos até o índice ser considerado desatualizado.
+        """
+        self.ttl_seconds = ttl_seconds
+        self._by_plate: Dict[str, List[Dict[str, Any]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        """
+        Indica se o índice precisa ser (re)construído antes de ser consultado.
+
+        Returns:
+            bool: True se o índice nunca foi carregado, foi invalidado ou expirou.
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                return True
+            return time.monotonic() - self._loaded_at >= self.ttl_seconds
+
+    def rebuild(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Reconstrói o índice a partir de todos os registros da planilha.
+
+        Args:
+            records (list): Registros da planilha (cabeçalho -> valor).
+        """
+        by_plate: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            plate = normalize_plate(record.get(PLATE_COLUMN_HEADER, ''))
+            if plate:
+                by_plate.setdefault(plate, []).append(record_to_entry(record))
+
+        with self._lock:
+            self._by_plate = by_plate
+            self._loaded_at = time.monotonic()
+
+    def extend(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Acrescenta registros novos ao final do índice, sem reconstruí-lo.
+
+        Args:
+            records (list): Registros lidos após a última linha já indexada.
+        """
+        with self._lock:
+            for record in records:
+                plate = normalize_plate(record.get(PLATE_COLUMN_HEADER, ''))
+                if plate:
+                    self._by_plate.setdefault(plate, []).append(record_to_entry(record))
+            self._loaded_at = time.monotonic()
+
+    def lookup(self, placa_veiculo: str) -> List[Dict[str, Any]]:
+        """
+        Retorna o histórico de uma placa, na ordem em que aparece na planilha.
+
+        Args:
+            placa_veiculo (str): Placa do veículo (qualquer capitalização).
+
+        Returns:
+            list: Entradas de histórico (lista vazia se a placa não existir).
+        """
+        with self._lock:
+            return list(self._by_plate.get(normalize_plate(placa_veiculo), []))
+
+    def invalidate(self) -> None:
+        """
+        Marca o índice como desatualizado, forçando a recarga na próxima consulta.
+        """
+        with self._lock:
+            self._loaded_at = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_plate)
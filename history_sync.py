@@ -0,0 +1,127 @@
+"""
+Sincronização incremental da planilha de histórico com o ``HistoryIndex``.
+
+As linhas da planilha só são acrescentadas ao final (``registrar_manutencao_planilha``
+usa ``append_row``), então não é preciso reler a planilha inteira a cada
+atualização. O sincronizador guarda a última linha lida (high-water mark) e,
+na atualização, busca apenas o intervalo ``A{n}:L`` em uma única requisição
+``batch_get`` junto com o cabeçalho.
+
+Recarga completa (fallback):
+    - Na primeira sincronização.
+    - Quando o cabeçalho mudou.
+    - Quando a última linha lida não existe mais ou foi alterada (linhas
+      removidas ou editadas na interface da planilha).
+    - Periodicamente, a cada ``full_reload_seconds``, para capturar edições
+      feitas no meio da planilha.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .history_index import HistoryIndex
+
+# Última coluna da planilha (CustomerID ... LogTimestamp = 12 colunas, A..L)
+LAST_COLUMN = 'L'
+
+
+def _pad_row(row: List[Any], width: int) -> List[Any]:
+    """
+    Ajusta a linha à largura do cabeçalho (a API omite células vazias no final).
+    """
+    return (list(row) + [''] * width)[:width]
+
+
+def _header_from_row(row: List[Any]) -> List[str]:
+    """
+    Normaliza a linha de cabeçalho, descartando células vazias no final.
+    """
+    header = [str(cell) for cell in row]
+    while header and not header[-1]:
+        header.pop()
+    return header
+
+
+class HistorySync:
+    """
+    Mantém o ``HistoryIndex`` atualizado lendo somente as linhas novas da planilha.
+    """
+
+    def __init__(self, index: HistoryIndex, full_reload_seconds: float = 3600.0, last_column: str = LAST_COLUMN):
+        """
+        Args:
+            index (HistoryIndex): Índice a ser mantido.
+            full_reload_seconds (float): Intervalo máximo entre recargas completas.
+            last_column (str): Letra da última coluna da planilha.
+        """
+        self.index = index
+        self.full_reload_seconds = full_reload_seconds
+        self.last_column = last_column
+        self.header: List[str] = []
+        self.stats = {"full_reloads": 0, "incremental_syncs": 0, "rows_fetched": 0}
+        self._last_row = 0  # Número (1-based) da última linha já lida; 0 = nada lido
+        self._last_row_values: Optional[List[Any]] = None
+        self._full_loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def sync(self, sheet) -> None:
+        """
+        Atualiza o índice com a planilha, de forma incremental sempre que possível.
+
+        Args:
+            sheet: Worksheet do gspread com o histórico.
+        """
+        with self._lock:
+            if self._needs_full_reload():
+                self._full_reload(sheet)
+                return
+
+            # Cabeçalho + (última linha lida em diante) em uma única requisição
+            header_range, tail_range = sheet.batch_get([
+                f"A1:{self.last_column}1",
+                f"A{self._last_row}:{self.last_column}",
+            ])
+            header = _header_from_row(header_range[0]) if header_range else []
+            width = len(self.header)
+
+            if header != self.header or not tail_range or _pad_row(tail_range[0], width) != self._last_row_values:
+                # A planilha foi editada de forma que o cache não consegue acompanhar
+                self._full_reload(sheet)
+                return
+
+            new_rows = [_pad_row(row, width) for row in tail_range[1:]]
+            self.index.extend([self._to_record(row) for row in new_rows])
+            if new_rows:
+                self._last_row += len(new_rows)
+                self._last_row_values = new_rows[-1]
+            self.stats["incremental_syncs"] += 1
+            self.stats["rows_fetched"] += len(new_rows)
+
+    def reset(self) -> None:
+        """
+        Descarta o high-water mark, forçando recarga completa na próxima sincronização.
+        """
+        with self._lock:
+            self._full_loaded_at = None
+
+    def _needs_full_reload(self) -> bool:
+        if self._full_loaded_at is None or not self.header:
+            return True
+        return time.monotonic() - self._full_loaded_at >= self.full_reload_seconds
+
+    def _full_reload(self, sheet) -> None:
+        values = sheet.get_values(f"A1:{self.last_column}")
+        self.header = _header_from_row(values[0]) if values else []
+        width = len(self.header)
+        rows = [_pad_row(row, width) for row in values[1:]]
+
+        self.index.rebuild([self._to_record(row) for row in rows])
+        self._last_row = len(values)
+        self._last_row_values = rows[-1] if rows else (list(self.header) if values else None)
+        self._full_loaded_at = time.monotonic()
+        self.stats["full_reloads"] += 1
+        self.stats["rows_fetched"] += len(rows)
+
+    def _to_record(self, row: List[Any]) -> Dict[str, Any]:
+        return dict(zip(self.header, row))
@@ -0,0 +1,259 @@
+"""
+Transporte HTTP opcional baseado em httpx, com conexões longas e HTTP/2.
+
+Por padrão o cliente do Calendar usa httplib2 e o gspread usa ``requests``,
+ambos em HTTP/1.1. Com ``HTTP_TRANSPORT=httpx``, as duas APIs passam a usar um
+único ``httpx.Client`` compartilhado (thread-safe), que mantém as conexões
+abertas entre as chamadas e multiplexa as requisições em conexões HTTP/2
+(pacote ``h2``, instalado pelo extra ``httpx[http2]`` do requirements.txt).
+Se o ``h2`` não estiver instalado, ``create_client`` registra um aviso e o
+transporte funciona em HTTP/1.1 com keep-alive.
+
+- ``HttpxHttplib2``: objeto compatível com ``httplib2.Http`` para o
+  googleapiclient (envolvido por ``google_auth_httplib2.AuthorizedHttp``);
+- ``HttpxAdapter``: adaptador ``requests`` para a sessão do gspread.
+
+``TransportStats`` conta requisições, conexões abertas e versões HTTP, para
+medir o reaproveitamento de conexões. Para testes contra um servidor HTTPS
+local, crie o cliente com ``create_client(verify=<CA do servidor>)`` (veja
+tests/test_http_transport.py).
+"""
+
+import logging
+import socket
+import ssl
+import threading
+import urllib.parse
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import httplib2
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class TransportStats:
+    """
+    Contadores de uso do transporte (requisições, conexões abertas e versões HTTP).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"requests": 0, "connections_opened": 0, "errors": 0}
+        self._http_versions: Dict[str, int] = {}
+
+    def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """
+        Callback de trace do httpcore (extensão ``trace`` do httpx).
+        """
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._counts["connections_opened"] += 1
+
+    def record_response(self, response: httpx.Response) -> None:
+        with self._lock:
+            self._counts["requests"] += 1
+            self._http_versions[response.http_version] = self._http_versions.get(response.http_version, 0) + 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self._counts["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: Contadores atuais, número de requisições que reaproveitaram uma conexão e versões HTTP usadas.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+            counts["connections_reused"] = max(0, counts["requests"] - counts["connections_opened"])
+            counts["http_versions"] = dict(self._http_versions)
+            return counts
+
+
+def create_client(
+    http2: bool = True,
+    max_connections: int = 10,
+    keepalive_expiry: float = 60.0,
+    timeout: float = 30.0,
+    verify: Union[bool, str] = True,
+    cert: Optional[Tuple[str, Optional[str], Optional[str]]] = None,
+) -> httpx.Client:
+    """
+    Cria o ``httpx.Client`` compartilhado pelas APIs.
+
+    Args:
+        http2 (bool): Usa HTTP/2 (requer o pacote ``h2``; sem ele, registra um aviso e usa HTTP/1.1).
+        max_connections (int): Número máximo de conexões abertas.
+        keepalive_expiry (float): Tempo em segundos que uma conexão ociosa permanece aberta.
+        timeout (float): Timeout das requisições em segundos.
+        verify (bool | str): Verificação TLS (ou caminho do CA, ex.: de um servidor de teste local).
+        cert (tuple): Certificado de cliente (arquivo do certificado, arquivo da chave, senha) para mTLS.
+
+    Returns:
+        httpx.Client: Cliente HTTP com pool de conexões.
+    """
+    if http2 and not HTTP2_AVAILABLE:
+        logger.warning(
+            "HTTP/2 solicitado, mas o pacote h2 não está instalado (pip install 'httpx[http2]'); usando HTTP/1.1."
+        )
+    if isinstance(verify, str) or cert is not None:
+        # Caminhos de CA e certificados de cliente são passados ao httpx como um SSLContext
+        context = ssl.create_default_context(cafile=verify if isinstance(verify, str) else None)
+        if verify is False:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        if cert is not None:
+            context.load_cert_chain(cert[0], keyfile=cert[1], password=cert[2])
+        verify = context
+    return httpx.Client(
+        http2=http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=timeout,
+        verify=verify,
+    )
+
+
+def _send(client: httpx.Client, stats: TransportStats, method: str, url: str,
+          body: Any, headers: Optional[Dict[str, str]], timeout: Any = None) -> httpx.Response:
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    try:
+        response = client.request(
+            method, url, content=body, headers=headers,
+            extensions={"trace": stats.trace},
+            **({"timeout": timeout} if timeout is not None else {}),
+        )
+    except httpx.TimeoutException as e:
+        stats.record_error()
+        raise socket.timeout(str(e)) from e
+    except httpx.TransportError as e:
+        stats.record_error()
+        raise ConnectionError(str(e)) from e
+    stats.record_response(response)
+    return response
+
+
+class HttpxHttplib2:
+    """
+    Implementa a interface de ``httplib2.Http`` usada pelo googleapiclient sobre um ``httpx.Client``.
+    """
+
+    def __init__(self, client: httpx.Client, stats: TransportStats,
+                 client_factory: Callable[..., httpx.Client] = create_client):
+        """
+        Args:
+            client (httpx.Client): Cliente HTTP compartilhado.
+            stats (TransportStats): Contadores de uso do transporte.
+            client_factory (callable): Cria os clientes com certificado de ``add_certificate``
+                (recebe ``cert=``; use as mesmas opções do cliente compartilhado).
+        """
+        self.client = client
+        self.stats = stats
+        self._client_factory = client_factory
+        # Clientes com certificado de cliente (mTLS), por domínio ("" = todos)
+        self._cert_clients: Dict[str, httpx.Client] = {}
+        # Atributos lidos/escritos por google_auth_httplib2.AuthorizedHttp
+        self.connections: Dict[str, Any] = {}
+        self.follow_redirects = True
+        self.redirect_codes = frozenset((300, 301, 302, 303, 307, 308))
+        self.timeout = None
+
+    def request(self, uri: str, method: str = "GET", body: Any = None, headers: Optional[Dict[str, str]] = None,
+                redirections: int = 5, connection_type: Any = None) -> Tuple[httplib2.Response, bytes]:
+        response = _send(self._client_for(uri), self.stats, method, uri, body, headers)
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info["status"] = str(response.status_code)
+        return httplib2.Response(info), response.content
+
+    def add_certificate(self, key, cert, domain, password=None) -> None:
+        """
+        Usa um certificado de cliente (mTLS) nas requisições para ``domain``, como ``httplib2.Http``.
+
+        O cliente compartilhado não é alterado: as requisições para o domínio passam
+        a usar um cliente httpx próprio, criado com o certificado.
+
+        Args:
+            key (str): Arquivo da chave privada.
+            cert (str): Arquivo do certificado.
+            domain (str): Host (ou host:porta) de destino; string vazia vale para todos.
+            password (str): Senha da chave, se houver.
+        """
+        previous = self._cert_clients.get(domain)
+        self._cert_clients[domain] = self._client_factory(cert=(cert, key, password))
+        if previous is not None:
+            previous.close()
+
+    def _client_for(self, uri: str) -> httpx.Client:
+        if not self._cert_clients:
+            return self.client
+        parts = urllib.parse.urlsplit(uri)
+        for domain in (parts.netloc, parts.hostname or '', ''):
+            if domain in self._cert_clients:
+                return self._cert_clients[domain]
+        return self.client
+
+    def close(self) -> None:
+        # O cliente httpx compartilhado é fechado por quem o criou; os de certificado são deste objeto
+        for client in self._cert_clients.values():
+            client.close()
+        self._cert_clients.clear()
+
+
+class HttpxAdapter(BaseAdapter):
+    """
+    Adaptador ``requests`` que envia as requisições por um ``httpx.Client``.
+    """
+
+    def __init__(self, client: httpx.Client, stats: TransportStats):
+        """
+        Args:
+            client (httpx.Client): Cliente HTTP compartilhado.
+            stats (TransportStats): Contadores de uso do transporte.
+        """
+        super().__init__()
+        self.client = client
+        self.stats = stats
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout: Any = None,
+             verify: Any = True, cert: Any = None, proxies: Any = None) -> requests.Response:
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        try:
+            response = _send(self.client, self.stats, request.method, request.url, request.body,
+                             dict(request.headers), timeout)
+        except socket.timeout as e:
+            raise requests.exceptions.Timeout(str(e), request=request) from e
+        except ConnectionError as e:
+            raise requests.exceptions.ConnectionError(str(e), request=request) from e
+
+        result = requests.Response()
+        result.status_code = response.status_code
+        # O httpx já descompacta o corpo: o cabeçalho de compressão não vale mais
+        result.headers = CaseInsensitiveDict(
+            (key, value) for key, value in response.headers.items() if key.lower() != 'content-encoding'
+        )
+        result._content = response.content
+        result.url = request.url
+        result.reason = response.reason_phrase
+        result.encoding = response.encoding
+        result.request = request
+        result.connection = self
+        return result
+
+    def close(self) -> None:
+        # O cliente httpx é compartilhado e fechado por quem o criou
+        pass
@@ -0,0 +1,186 @@
+"""
+Atalho determinístico para consultas de histórico por placa, sem passar pelo modelo.
+
+Boa parte das mensagens é apenas "histórico da placa ABC1D23". Nesses casos a
+ida ao Gemini serve só para decidir chamar ``buscar_historico_cliente`` e
+depois formatar o resultado. ``PlateIntentRouter`` reconhece essas mensagens
+(uma única placa, no formato antigo ``ABC-1234`` ou Mercosul ``ABC1D23``, com
+uma palavra de consulta de histórico e nenhuma de agendamento), chama a
+ferramenta diretamente e responde com um texto fixo. Qualquer outra mensagem,
+ou um erro da ferramenta, segue para o agente.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional
+
+from .history_index import normalize_plate
+
+# Placa antiga (ABC-1234 ou ABC1234) ou Mercosul (ABC1D23)
+PLATE_PATTERN = re.compile(r'\b([A-Z]{3}-?\d{4}|[A-Z]{3}\d[A-Z]\d{2})\b', re.IGNORECASE)
+
+# Palavras (sem acentos, minúsculas) que indicam consulta de histórico
+HISTORY_KEYWORDS = ('historico', 'manutencoes anteriores', 'servicos anteriores', 'revisoes anteriores', 'ja fez', 'ultimas manutencoes', 'ultimos servicos')
+
+# Palavras que indicam outra intenção: a mensagem segue para o agente
+OTHER_INTENT_KEYWORDS = ('agend', 'marcar', 'remarcar', 'horario', 'disponib', 'cancel', 'amanha', 'hoje', 'trocar', 'orcamento', 'preco', 'quanto')
+
+# Mensagens mais longas que isso provavelmente pedem mais do que o histórico
+MAX_MESSAGE_CHARS = 120
+
+
+def find_plates(text: str) -> List[str]:
+    """
+    Encontra as placas (formato antigo ou Mercosul) citadas no texto.
+
+    Args:
+        text (str): Mensagem do cliente.
+
+    Returns:
+        list: Placas encontradas, normalizadas (``normalize_plate``: maiúsculas e sem hífen),
+              sem repetição e na ordem do texto.
+    """
+    plates: List[str] = []
+    for match in PLATE_PATTERN.finditer(text):
+        plate = normalize_plate(match.group(1))
+        if plate not in plates:
+            plates.append(plate)
+    return plates
+
+
+def match_history_intent(text: str) -> Optional[str]:
+    """
+    Verifica se a mensagem é claramente uma consulta de histórico de uma única placa.
+
+    Args:
+        text (str): Mensagem do cliente.
+
+    Returns:
+        str: A placa consultada, ou None se a mensagem deve seguir para o agente.
+    """
+    if len(text) > MAX_MESSAGE_CHARS:
+        return None
+    normalized = _fold(text)
+    if not any(keyword in normalized for keyword in HISTORY_KEYWORDS):
+        return None
+    if any(keyword in normalized for keyword in OTHER_INTENT_KEYWORDS):
+        return None
+    plates = find_plates(text)
+    if len(plates) != 1:
+        return None
+    return plates[0]
+
+
+def render_history(plate: str, result: Dict[str, Any]) -> str:
+    """
+    Formata o resultado de ``buscar_historico_cliente`` como resposta ao cliente.
+
+    Args:
+        plate (str): Placa consultada.
+        result (dict): Resultado da ferramenta com status 'success'.
+
+    Returns:
+        str: Texto da resposta.
+    """
+    entries = result.get("data") or []
+    if not entries:
+        return f"Não encontrei nenhum histórico de manutenção para a placa {plate}."
+    lines = [f"Estes são os últimos serviços registrados para a placa {plate}:"]
+    for entry in entries:
+        line = f"- {entry.get('Data', 'N/A')}: {entry.get('Servico', 'N/A')} ({entry.get('KM', 'N/A')} km)"
+        if entry.get('Observacoes'):
+            line += f" — {entry['Observacoes']}"
+        lines.append(line)
+    lines.append("Posso ajudar com mais alguma coisa, como agendar uma nova manutenção?")
+    return "\n".join(lines)
+
+
+class PlateIntentRouter:
+    """
+    Responde consultas de histórico por placa sem o modelo e mede o ganho.
+    """
+
+    def __init__(self, lookup: Callable[[str], Dict[str, Any]]):
+        """
+        Args:
+            lookup (callable): Ferramenta de busca de histórico (``buscar_historico_cliente``).
+        """
+        self.lookup = lookup
+        self.stats = {
+            "messages": 0,
+            "hits": 0,
+            "fallbacks": 0,
+            "fast_path_seconds": 0.0,
+            "agent_turns": 0,
+            "agent_seconds": 0.0,
+        }
+        self._lock = threading.Lock()
+
+    def route(self, text: str) -> Optional[str]:
+        """
+        Responde a mensagem pelo atalho, se ela for uma consulta de histórico clara.
+
+        Args:
+            text (str): Mensagem do cliente.
+
+        Returns:
+            str: Resposta pronta, ou None se a mensagem deve seguir para o agente.
+        """
+        started = time.monotonic()
+        plate = match_history_intent(text)
+        reply = None
+        if plate is not None:
+            result = self.lookup(plate)
+            if result.get("status") == "success":
+                reply = render_history(plate, result)
+
+        with self._lock:
+            self.stats["messages"] += 1
+            if reply is None:
+                self.stats["fallbacks"] += 1
+            else:
+                self.stats["hits"] += 1
+                self.stats["fast_path_seconds"] += time.monotonic() - started
+        return reply
+
+    def record_agent_turn(self, seconds: float) -> None:
+        """
+        Registra a duração de um turno respondido pelo agente (base para estimar o tempo economizado).
+
+        Args:
+            seconds (float): Duração do turno em segundos.
+        """
+        with self._lock:
+            self.stats["agent_turns"] += 1
+            self.stats["agent_seconds"] += seconds
+
+    def hit_rate(self) -> Optional[float]:
+        """
+        Returns:
+            float: Fração das mensagens respondidas pelo atalho, ou None sem mensagens.
+        """
+        with self._lock:
+            if not self.stats["messages"]:
+                return None
+            return self.stats["hits"] / self.stats["messages"]
+
+    def latency_saved_seconds(self) -> Optional[float]:
+        """
+        Estima o tempo economizado: (duração média de um turno do agente - duração média do atalho) x acertos.
+
+        Returns:
+            float: Segundos economizados, ou None se ainda não há turnos do agente para comparar.
+        """
+        with self._lock:
+            if not self.stats["agent_turns"] or not self.stats["hits"]:
+                return None
+            agent_average = self.stats["agent_seconds"] / self.stats["agent_turns"]
+            fast_average = self.stats["fast_path_seconds"] / self.stats["hits"]
+            return max(0.0, agent_average - fast_average) * self.stats["hits"]
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
@@ -0,0 +1,163 @@
+"""
+Journal local (write-ahead log) das linhas pendentes de gravação na planilha.
+
+Cada linha é registrada em um arquivo append-only, com ``fsync``, antes de ser
+enviada ao Google Sheets. Quando a gravação é confirmada, um registro de
+confirmação (ack) é acrescentado. Na inicialização, as linhas sem confirmação
+são reenviadas, então um agendamento não se perde se a API falhar ou se o
+processo morrer antes do flush.
+
+Formato: uma linha JSON por registro::
+
+    {"op": "append", "id": "...", "row": [...]}
+    {"op": "ack", "id": "..."}
+
+O arquivo é compactado (reescrito apenas com as linhas pendentes) depois de
+``compact_after`` confirmações. Cada processo deve usar o seu próprio arquivo.
+
+O arquivo (e o seu diretório) só é criado e lido no primeiro uso, de modo que
+criar o journal — por exemplo, ao importar o agente — não toca o disco.
+"""
+
+import collections
+import json
+import logging
+import os
+import threading
+from typing import Any, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WriteJournal:
+    """
+    Journal append-only em arquivo das linhas ainda não confirmadas na planilha.
+    """
+
+    def __init__(self, path: str, compact_after: int = 1000):
+        """
+        Args:
+            path (str): Caminho do arquivo do journal (criado no primeiro uso se não existir).
+            compact_after (int): Número de confirmações que dispara a compactação do arquivo.
+        """
+        self.path = path
+        self.compact_after = compact_after
+        self._unacked: "collections.OrderedDict[str, List[Any]]" = collections.OrderedDict()
+        self._acks_since_compact = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def append(self, row_id: str, row: List[Any]) -> None:
+        """
+        Registra uma linha de forma durável antes do envio à planilha.
+
+        Args:
+            row_id (str): Identificador da linha.
+            row (list): Valores da linha.
+        """
+        with self._lock:
+            self._open()
+            self._write({"op": "append", "id": row_id, "row": row})
+            self._unacked[row_id] = list(row)
+
+    def ack(self, row_ids: Iterable[str]) -> None:
+        """
+        Marca linhas como gravadas com sucesso na planilha.
+
+        Args:
+            row_ids (iterable): Identificadores das linhas confirmadas.
+        """
+        with self._lock:
+            self._open()
+            for row_id in row_ids:
+                if self._unacked.pop(row_id, None) is not None:
+                    self._file.write(json.dumps({"op": "ack", "id": row_id}) + "\n")
+                    self._acks_since_compact += 1
+            self._sync()
+            if self._acks_since_compact >= self.compact_after:
+                self._compact()
+
+    def pending(self) -> List[Tuple[str, List[Any]]]:
+        """
+        Retorna as linhas ainda não confirmadas, na ordem em que foram registradas.
+
+        Returns:
+            list: Pares (row_id, row).
+        """
+        with self._lock:
+            self._open()
+            return list(self._unacked.items())
+
+    def compact(self) -> None:
+        """
+        Reescreve o arquivo contendo apenas as linhas ainda não confirmadas.
+        """
+        with self._lock:
+            self._open()
+            self._compact()
+
+    def close(self) -> None:
+        """
+        Compacta e fecha o arquivo do journal.
+        """
+        with self._lock:
+            if self._file is None or self._file.closed:
+                return
+            self._compact()
+            self._file.close()
+
+    def _open(self) -> None:
+        if self._file is not None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            # Última linha incompleta (processo interrompido durante a escrita, antes do
+            # fsync): é removida do arquivo, senão o próximo registro seria gravado colado
+            # a ela e se perderia na próxima leitura
+            logger.warning("Descartando registro incompleto no fim do journal %s", self.path)
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+                f.flush()
+                os.fsync(f.fileno())
+        for line in data[:complete].decode('utf-8', errors='replace').splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning("Ignorando registro inválido no journal %s", self.path)
+                continue
+            if entry.get("op") == "append":
+                self._unacked[entry["id"]] = entry["row"]
+            elif entry.get("op") == "ack":
+                self._unacked.pop(entry["id"], None)
+
+    def _write(self, entry: dict) -> None:
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _compact(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row_id, row in self._unacked.items():
+                f.write(json.dumps({"op": "append", "id": row_id, "row": row}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._acks_since_compact = 0
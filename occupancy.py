@@ -0,0 +1,155 @@
+"""
+Ocupação diária da agenda em bitmaps, para serviços de duração fixa.
+
+O horário de trabalho de cada dia é dividido em células de ``granularity``
+minutos (por exemplo, 36 células de 15 minutos entre 9:00 e 18:00) e a
+ocupação de cada box vira um inteiro em que o bit ``i`` indica que a célula
+``i`` está ocupada. Encontrar onde cabe um serviço de ``k`` células passa a ser
+uma operação de janela deslizante sobre bits (``livre & livre >> 1 & ...``,
+feita por duplicação em O(log k) operações).
+
+Vários dias são concatenados num único inteiro (um bloco de células por dia),
+então um mês inteiro é respondido numa única passada sobre o bitmap.
+
+Os horários retornados começam sempre em múltiplos da granularidade: um
+intervalo ocupado que termina às 10:07 libera a agenda a partir das 10:15
+(com granularidade de 15 minutos).
+"""
+
+import datetime
+from typing import Dict, List, Sequence, Tuple
+
+from .slots import Interval
+
+
+def cell_count(window_start: datetime.datetime, window_end: datetime.datetime, granularity: int) -> int:
+    """
+    Calcula quantas células de ``granularity`` minutos cabem na janela.
+
+    Args:
+        window_start (datetime): Início da janela de trabalho.
+        window_end (datetime): Fim da janela de trabalho.
+        granularity (int): Tamanho da célula em minutos.
+
+    Returns:
+        int: Número de células inteiras na janela.
+    """
+    return int((window_end - window_start) // datetime.timedelta(minutes=granularity))
+
+
+def busy_bitmap(window_start: datetime.datetime, cells: int, granularity: int, busy: Sequence[Interval]) -> int:
+    """
+    Monta o bitmap de ocupação de um dia: bit ``i`` ligado se a célula ``i`` tem algum trecho ocupado.
+
+    Args:
+        window_start (datetime): Início da janela de trabalho (com fuso horário).
+        cells (int): Número de células da janela.
+        granularity (int): Tamanho da célula em minutos.
+        busy (sequence): Intervalos ocupados (início, fim).
+
+    Returns:
+        int: Bitmap de ocupação.
+    """
+    cell = datetime.timedelta(minutes=granularity)
+    bitmap = 0
+    for start, end in busy:
+        # Arredonda para fora: qualquer sobreposição ocupa a célula inteira
+        first = max(0, (start - window_start) // cell)
+        last = min(cells, -((window_start - end) // cell))
+        if first < last:
+            bitmap |= ((1 << (last - first)) - 1) << first
+    return bitmap
+
+
+def run_starts(free: int, length: int) -> int:
+    """
+    Retorna os bits ``i`` tais que as células ``i .. i + length - 1`` estão todas livres.
+
+    Args:
+        free (int): Bitmap de células livres.
+        length (int): Número de células consecutivas exigidas (>= 1).
+
+    Returns:
+        int: Bitmap das posições de início válidas.
+    """
+    result = free
+    span = 1
+    while span < length:
+        step = min(span, length - span)
+        result &= result >> step
+        span += step
+    return result
+
+
+def slots_for_days(
+    windows: Sequence[Tuple[datetime.datetime, datetime.datetime]],
+    busy_by_day: Sequence[Dict[str, Sequence[Interval]]],
+    duration_minutes: int,
+    granularity: int,
+) -> List[List[datetime.datetime]]:
+    """
+    Calcula os horários disponíveis de vários dias numa única passada por box.
+
+    Um horário está disponível quando ao menos um box fica livre durante todo o
+    serviço. Dentro de cada trecho livre de um box, os horários são recortados
+    em sequência a cada ``duration_minutes`` (mesmo critério de ``slots.cut_slots``).
+
+    Args:
+        windows (sequence): Janela (início, fim) de trabalho de cada dia; todas com o mesmo tamanho.
+        busy_by_day (sequence): Para cada dia, id do calendário -> intervalos ocupados.
+        duration_minutes (int): Duração do serviço, múltiplo de ``granularity``.
+        granularity (int): Tamanho da célula em minutos.
+
+    Returns:
+        list: Para cada dia, os horários de início disponíveis em ordem crescente.
+
+    Raises:
+        ValueError: Se a duração não for múltiplo da granularidade ou as janelas tiverem tamanhos diferentes.
+    """
+    if duration_minutes <= 0 or duration_minutes % granularity:
+        raise ValueError("A duração deve ser um múltiplo positivo da granularidade.")
+    if not windows:
+        return []
+    cells = cell_count(windows[0][0], windows[0][1], granularity)
+    if any(cell_count(start, end, granularity) != cells for start, end in windows):
+        raise ValueError("Todas as janelas devem ter o mesmo tamanho.")
+
+    length = duration_minutes // granularity
+    starts_by_day: List[set] = [set() for _ in windows]
+    if length > cells:
+        return [[] for _ in windows]
+
+    # Posições de início que não atravessam o fim do dia, repetidas para cada bloco diário
+    day_valid = (1 << (cells - length + 1)) - 1
+    day_full = (1 << cells) - 1
+    valid = 0
+    for index in range(len(windows)):
+        valid |= day_valid << (index * cells)
+
+    calendar_ids = sorted({calendar_id for busy in busy_by_day for calendar_id in busy})
+    for calendar_id in calendar_ids:
+        # Bitmap livre de todos os dias do box, concatenados
+        free = 0
+        for index, ((window_start, _), busy) in enumerate(zip(windows, busy_by_day)):
+            occupied = busy_bitmap(window_start, cells, granularity, busy.get(calendar_id, []))
+            free |= (day_full & ~occupied) << (index * cells)
+
+        starts = run_starts(free, length) & valid
+
+        # Recorta os horários em sequência dentro de cada trecho livre
+        next_allowed = 0
+        while starts:
+            lowest = starts & -starts
+            position = lowest.bit_length() - 1
+            starts ^= lowest
+            if position < next_allowed:
+                continue
+            next_allowed = position + length
+            day_index, cell = divmod(position, cells)
+            starts_by_day[day_index].add(cell)
+
+    cell_delta = datetime.timedelta(minutes=granularity)
+    return [
+        [window_start + cell * cell_delta for cell in sorted(starts)]
+        for (window_start, _), starts in zip(windows, starts_by_day)
+    ]
@@ -0,0 +1,124 @@
+"""
+Limitador de taxa (token bucket) por API do Google, compartilhado pelo processo.
+
+As cotas do Sheets e do Calendar são contadas por minuto. Sem um limite no
+cliente, um pico de conversas simultâneas passa da cota, recebe uma rajada de
+HTTP 429 e as retentativas (retry.py) voltam todas juntas, oscilando em torno
+do limite. ``TokenBucket`` libera até ``per_minute`` requisições por minuto,
+com rajadas de até ``burst`` requisições, para manter a vazão logo abaixo da
+cota.
+
+Quando não há ficha disponível, a chamada espera a sua vez (em ordem de
+chegada) por até ``max_wait_seconds``; se a espera necessária for maior, a
+chamada é descartada na hora com ``RateLimitExceeded``, sem consumir ficha.
+``stats`` inclui a profundidade atual e máxima da fila de espera.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class RateLimitExceeded(Exception):
+    """
+    A requisição foi descartada porque esperaria mais que o permitido por uma ficha.
+    """
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe com espera limitada e fila em ordem de chegada.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        per_minute: float,
+        burst: int,
+        max_wait_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            name (str): Nome da API (usado nas mensagens de erro).
+            per_minute (float): Requisições liberadas por minuto.
+            burst (int): Número máximo de fichas acumuladas (tamanho da rajada).
+            max_wait_seconds (float): Espera máxima por uma ficha antes de descartar a requisição.
+            clock (callable): Relógio monotônico (substituível em testes).
+            sleep (callable): Função de espera (substituível em testes).
+        """
+        if per_minute <= 0 or burst < 1:
+            raise ValueError("A taxa e a rajada precisam ser positivas.")
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_wait_seconds = max_wait_seconds
+        self._clock = clock
+        self._sleep = sleep
+        # Pode ficar negativo: fichas já reservadas por requisições que estão esperando
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.stats = {
+            "acquired": 0,
+            "waited": 0,
+            "wait_seconds": 0.0,
+            "shed": 0,
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+        }
+
+    def acquire(self, tokens: int = 1, timeout: Optional[float] = None) -> float:
+        """
+        Obtém ``tokens`` fichas, esperando a sua vez se necessário.
+
+        Args:
+            tokens (int): Fichas consumidas (ex.: número de requisições de um lote).
+            timeout (float): Espera máxima em segundos (None = ``max_wait_seconds``).
+
+        Returns:
+            float: Segundos esperados.
+
+        Raises:
+            RateLimitExceeded: Se a espera necessária for maior que ``timeout``.
+        """
+        timeout = self.max_wait_seconds if timeout is None else timeout
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if wait > timeout:
+                self.stats["shed"] += 1
+                raise RateLimitExceeded(
+                    f"Limite de requisições à API do {self.name} atingido; tente novamente em instantes."
+                )
+            self._tokens -= tokens
+            self.stats["acquired"] += 1
+            if wait <= 0:
+                return 0.0
+            self.stats["waited"] += 1
+            self.stats["wait_seconds"] += wait
+            self.stats["queue_depth"] += 1
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self.stats["queue_depth"])
+        try:
+            self._sleep(wait)
+        finally:
+            with self._lock:
+                self.stats["queue_depth"] -= 1
+        return wait
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: Contadores atuais, fichas disponíveis e a taxa configurada (por minuto).
+        """
+        with self._lock:
+            now = self._clock()
+            snapshot = dict(self.stats)
+            snapshot["tokens_available"] = round(
+                min(float(self.burst), self._tokens + (now - self._updated) * self.rate), 2
+            )
+            snapshot["per_minute"] = self.rate * 60.0
+            return snapshot
@@ -0,0 +1,286 @@
+"""
+Política de retentativas compartilhada pelas chamadas às APIs do Google.
+
+Erros de cota (HTTP 429, ou 403 com motivo ``rateLimitExceeded``) e falhas
+transitórias do servidor (HTTP 500 e 503) costumam desaparecer em poucos
+milissegundos. Em vez de devolver o erro ao modelo, que gastaria um turno
+inteiro para tentar de novo, ``RetryPolicy.call`` repete a chamada dentro da
+própria ferramenta com backoff exponencial e jitter completo:
+
+    espera = aleatório(0, min(max_delay, base_delay * 2 ** tentativa))
+
+respeitando o cabeçalho ``Retry-After`` quando a API o envia. O número de
+tentativas é limitado e todas as chamadas de uma mesma execução de ferramenta
+(``scope()``) dividem um orçamento de tempo (``deadline_seconds``): uma espera
+que ultrapassaria o prazo não é feita e o erro é devolvido imediatamente.
+
+Com ``limiter`` (um ``TokenBucket`` de rate_limit.py), cada tentativa espera
+antes a sua vez no limitador da API, dentro do mesmo orçamento de tempo.
+
+Os erros do googleapiclient (``HttpError``) e do gspread (``APIError``) são
+reconhecidos. As métricas (chamadas, retentativas, recuperações, desistências
+e tempo de espera) são agrupadas pela ferramenta em execução.
+"""
+
+import contextlib
+import contextvars
+import json
+import random
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import gspread
+import requests
+from googleapiclient.errors import HttpError
+
+# Códigos HTTP considerados transitórios
+RETRYABLE_STATUS_CODES = frozenset((429, 500, 503))
+# Motivos de erro (campo "reason") de cota excedida, enviados com HTTP 403
+RETRYABLE_REASONS = frozenset(('rateLimitExceeded', 'userRateLimitExceeded'))
+# Nome usado nas métricas para chamadas feitas fora de uma ferramenta
+NO_TOOL = '-'
+
+# Ferramenta em execução e o instante (time.monotonic) em que o seu orçamento termina
+_current_scope: contextvars.ContextVar[Tuple[str, Optional[float]]] = contextvars.ContextVar(
+    'autoagenda_retry_scope', default=(NO_TOOL, None)
+)
+
+
+def _error_details(error: Exception) -> Tuple[Optional[int], Optional[str], Optional[str]]:
+    """
+    Extrai (código HTTP, motivo, Retry-After) de um erro das APIs do Google.
+    """
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        content = error.content
+        retry_after = error.resp.get('retry-after')
+    elif isinstance(error, gspread.exceptions.APIError):
+        status = error.response.status_code
+        content = error.response.content
+        retry_after = error.response.headers.get('Retry-After')
+    else:
+        return None, None, None
+
+    reason = None
+    try:
+        details = json.loads(content).get('error', {})
+        errors = details.get('errors') or [{}]
+        reason = errors[0].get('reason') or details.get('status')
+    except (AttributeError, TypeError, ValueError):
+        pass
+    return int(status), reason, retry_after
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Indica se o erro é de cota ou uma falha transitória do servidor.
+
+    Args:
+        error (Exception): Erro levantado por uma chamada à API.
+
+    Returns:
+        bool: True para HTTP 429, 500, 503 ou motivo ``rateLimitExceeded``.
+    """
+    status, reason, _ = _error_details(error)
+    if status is None:
+        return False
+    return status in RETRYABLE_STATUS_CODES or reason in RETRYABLE_REASONS
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Indica se o erro é transitório: cota, falha do servidor (``is_retryable``) ou falha de rede.
+
+    Args:
+        error (Exception): Erro levantado por uma chamada à API.
+
+    Returns:
+        bool: True se a mesma chamada pode funcionar mais tarde.
+    """
+    return is_retryable(error) or isinstance(error, (
+        ConnectionError, socket.timeout, requests.exceptions.ConnectionError, requests.exceptions.Timeout
+    ))
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    _, _, retry_after = _error_details(error)
+    try:
+        return max(0.0, float(retry_after)) if retry_after is not None else None
+    except ValueError:
+        # Retry-After também pode ser uma data HTTP; nesse caso vale o backoff normal
+        return None
+
+
+class RetryPolicy:
+    """
+    Repete chamadas que falharam com erros transitórios, com backoff exponencial e jitter.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.2,
+        max_delay: float = 2.0,
+        deadline_seconds: float = 10.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            max_attempts (int): Número máximo de tentativas de cada chamada (incluindo a primeira).
+            base_delay (float): Espera máxima (em segundos) antes da primeira retentativa.
+            max_delay (float): Limite (em segundos) de cada espera.
+            deadline_seconds (float): Orçamento de tempo de uma execução de ferramenta (ou de uma chamada fora dela).
+            sleep (callable): Função de espera (substituível em testes).
+        """
+        if max_attempts < 1:
+            raise ValueError("É preciso ao menos uma tentativa.")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds
+        self._sleep = sleep
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def scope(self, tool: str) -> Iterator[None]:
+        """
+        Marca a execução de uma ferramenta: as chamadas dentro do bloco dividem o
+        orçamento de tempo e são contabilizadas com o nome da ferramenta.
+
+        Args:
+            tool (str): Nome da ferramenta.
+        """
+        token = _current_scope.set((tool, time.monotonic() + self.deadline_seconds))
+        try:
+            yield
+        finally:
+            _current_scope.reset(token)
+
+    def call(self, func: Callable[..., Any], *args, limiter: Optional[Any] = None, cost: int = 1, **kwargs) -> Any:
+        """
+        Chama ``func(*args, **kwargs)``, repetindo-a enquanto falhar com um erro transitório.
+
+        Args:
+            func (callable): Chamada à API (ex.: ``request.execute``).
+            limiter (TokenBucket): Limitador de taxa da API (rate_limit.py), consultado antes de
+                cada tentativa; a espera por fichas também respeita o orçamento de tempo.
+            cost (int): Fichas consumidas por tentativa (ex.: número de requisições de um lote).
+
+        Returns:
+            O resultado de ``func``.
+
+        Raises:
+            RateLimitExceeded: Se não houver ficha do limitador dentro do orçamento de tempo.
+            Exception: O último erro, se não for transitório, se as tentativas acabarem
+                ou se a próxima espera ultrapassar o orçamento de tempo.
+        """
+        deadline = self.deadline()
+        attempt = 0
+        self._record("calls")
+        while True:
+            if limiter is not None:
+                self._acquire(limiter, cost, deadline)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                delay = self.next_delay(attempt, e, deadline)
+                if delay is None:
+                    self._record("exhausted")
+                    raise
+                self.wait(delay)
+                attempt += 1
+                continue
+            if attempt:
+                self._record("recovered")
+            return result
+
+    def _acquire(self, limiter: Any, cost: int, deadline: float) -> None:
+        timeout = max(0.0, min(limiter.max_wait_seconds, deadline - time.monotonic()))
+        try:
+            waited = limiter.acquire(cost, timeout=timeout)
+        except Exception:
+            self._record("shed")
+            raise
+        if waited:
+            with self._lock:
+                self._metrics_for(_current_scope.get()[0])["rate_limit_wait_seconds"] += waited
+
+    def deadline(self) -> float:
+        """
+        Returns:
+            float: Instante (``time.monotonic``) em que o orçamento da ferramenta atual termina.
+        """
+        _, deadline = _current_scope.get()
+        return deadline if deadline is not None else time.monotonic() + self.deadline_seconds
+
+    def next_delay(self, attempt: int, error: Exception, deadline: float) -> Optional[float]:
+        """
+        Calcula a espera antes da próxima tentativa.
+
+        Args:
+            attempt (int): Número de retentativas já feitas (0 antes da primeira).
+            error (Exception): Erro da última tentativa.
+            deadline (float): Instante (``time.monotonic``) limite, de ``deadline()``.
+
+        Returns:
+            float: Segundos de espera, ou None se as tentativas acabaram ou a espera ultrapassaria o prazo.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if time.monotonic() + delay > deadline:
+            return None
+        return delay
+
+    def wait(self, delay: float) -> None:
+        """
+        Espera ``delay`` segundos antes de uma retentativa e a contabiliza.
+        """
+        with self._lock:
+            metrics = self._metrics_for(_current_scope.get()[0])
+            metrics["retries"] += 1
+            metrics["sleep_seconds"] += delay
+        self._sleep(delay)
+
+    def record_recovered(self) -> None:
+        """
+        Contabiliza uma operação que só teve sucesso após retentativas (para quem usa ``next_delay``/``wait`` diretamente).
+        """
+        self._record("recovered")
+
+    def record_exhausted(self) -> None:
+        """
+        Contabiliza uma operação que falhou mesmo após as retentativas possíveis.
+        """
+        self._record("exhausted")
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns:
+            dict: Por ferramenta, chamadas, retentativas, chamadas recuperadas, desistências,
+                  segundos de espera entre tentativas, chamadas descartadas pelo limitador
+                  de taxa e segundos de espera por fichas.
+        """
+        with self._lock:
+            return {tool: dict(metrics) for tool, metrics in self._metrics.items()}
+
+    def _record(self, key: str) -> None:
+        with self._lock:
+            self._metrics_for(_current_scope.get()[0])[key] += 1
+
+    def _metrics_for(self, tool: str) -> Dict[str, float]:
+        metrics = self._metrics.get(tool)
+        if metrics is None:
+            metrics = self._metrics[tool] = {
+                "calls": 0, "retries": 0, "recovered": 0, "exhausted": 0, "sleep_seconds": 0.0,
+                "shed": 0, "rate_limit_wait_seconds": 0.0,
+            }
+        return metrics
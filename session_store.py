@@ -0,0 +1,236 @@
+"""
+Serviço de sessões persistente (SQLite) com cache em memória das sessões ativas.
+
+As conversas ficam gravadas em disco pelo ``SqliteSessionService`` do ADK,
+identificadas pelo id real do cliente e da sessão, e sobrevivem a reinícios
+do processo. Para não reler e decodificar o histórico inteiro do banco a cada
+mensagem, as sessões usadas recentemente ficam em um cache limitado a
+``max_sessions`` entradas (LRU). Sessões sem atividade há mais de
+``idle_ttl_seconds`` saem do cache (continuam no disco e são recarregadas na
+próxima mensagem). Cada evento gravado é acrescentado à cópia em cache, sem
+copiar de novo a sessão inteira. O banco (e o seu diretório) só é aberto na
+primeira operação, de modo que criar o serviço não toca o disco.
+
+Cada sessão deve ser atendida por um único processo por vez: se outro processo
+gravar na mesma sessão, a próxima gravação daqui falha com ``StaleSessionError``
+e a entrada é descartada do cache, para ser relida do banco.
+"""
+
+import collections
+import copy
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.adk.events.event import Event
+from google.adk.sessions import BaseSessionService, Session, State
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.sqlite_session_service import SqliteSessionService
+
+_SessionKey = Tuple[str, str, str]
+
+
+class CachedSessionService(BaseSessionService):
+    """
+    Envolve outro ``BaseSessionService`` com um cache LRU e expiração por inatividade.
+    """
+
+    def __init__(
+        self,
+        backend_factory: Callable[[], BaseSessionService],
+        max_sessions: int = 1000,
+        idle_ttl_seconds: float = 1800.0,
+    ):
+        """
+        Args:
+            backend_factory (callable): Cria o serviço que persiste as sessões (por exemplo, SQLite);
+                chamado apenas na primeira operação.
+            max_sessions (int): Número máximo de sessões mantidas em memória.
+            idle_ttl_seconds (float): Tempo sem atividade após o qual a sessão sai do cache.
+        """
+        self._backend_factory = backend_factory
+        self._backend: Optional[BaseSessionService] = None
+        self._backend_lock = threading.Lock()
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._entries: "collections.OrderedDict[_SessionKey, Tuple[float, Session]]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> BaseSessionService:
+        """
+        Serviço de persistência, criado no primeiro acesso.
+        """
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = self._backend_factory()
+        return self._backend
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session = await self.backend.create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        self._store(session)
+        return session.model_copy(deep=True)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        if config is None:
+            cached = self._lookup((app_name, user_id, session_id))
+            if cached is not None:
+                return cached
+        session = await self.backend.get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None and config is None:
+            self._store(session)
+        return session
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await self.backend.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop((app_name, user_id, session_id), None)
+        await self.backend.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        return await self.backend.get_user_state(app_name=app_name, user_id=user_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        try:
+            event = await self.backend.append_event(session, event)
+        except Exception:
+            # O estado em memória pode estar desatualizado (ex.: StaleSessionError)
+            with self._lock:
+                self._entries.pop(key, None)
+            raise
+
+        delta = event.actions.state_delta if event.actions else None
+        if delta:
+            # Estado de app/usuário é compartilhado: as outras sessões em cache ficariam desatualizadas
+            self._drop_shared_state(session, delta)
+        if not self._append_cached(session, event):
+            self._store(session)
+        return event
+
+    async def flush(self) -> None:
+        await self.backend.flush()
+
+    def evict_idle(self) -> int:
+        """
+        Remove do cache as sessões sem atividade há mais de ``idle_ttl_seconds``.
+
+        Returns:
+            int: Número de sessões removidas.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (touched, _) in self._entries.items() if now - touched >= self.idle_ttl_seconds]
+            for key in expired:
+                del self._entries[key]
+            self.stats["expirations"] += len(expired)
+            return len(expired)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _lookup(self, key: _SessionKey) -> Optional[Session]:
+        self.evict_idle()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries[key] = (time.monotonic(), entry[1])
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1].model_copy(deep=True)
+
+    def _store(self, session: Session) -> None:
+        snapshot = session.model_copy(deep=True)
+        # Estado temporário vale apenas durante a invocação e não é persistido
+        for state_key in [k for k in snapshot.state if k.startswith(State.TEMP_PREFIX)]:
+            del snapshot.state[state_key]
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _append_cached(self, session: Session, event: Event) -> bool:
+        """
+        Acrescenta o evento à cópia em cache, se ela estiver exatamente um evento atrás da sessão.
+
+        Returns:
+            bool: False se não há cópia utilizável (ela precisa ser refeita com ``_store``).
+        """
+        key = (session.app_name, session.user_id, session.id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or len(entry[1].events) + 1 != len(session.events):
+                return False
+            snapshot = entry[1]
+            snapshot.events.append(event.model_copy(deep=True))
+            delta = event.actions.state_delta if event.actions else None
+            for state_key, value in (delta or {}).items():
+                if not state_key.startswith(State.TEMP_PREFIX):
+                    snapshot.state[state_key] = copy.deepcopy(value)
+            snapshot.last_update_time = session.last_update_time
+            self._entries[key] = (time.monotonic(), snapshot)
+            self._entries.move_to_end(key)
+        return True
+
+    def _drop_shared_state(self, session: Session, delta: Dict[str, Any]) -> None:
+        app_changed = any(k.startswith(State.APP_PREFIX) for k in delta)
+        user_changed = any(k.startswith(State.USER_PREFIX) for k in delta)
+        if not app_changed and not user_changed:
+            return
+        with self._lock:
+            for key in list(self._entries):
+                app_name, user_id, _ = key
+                if app_name != session.app_name:
+                    continue
+                if app_changed or user_id == session.user_id:
+                    del self._entries[key]
+
+
+def open_session_service(db_path: str, max_sessions: int = 1000, idle_ttl_seconds: float = 1800.0) -> CachedSessionService:
+    """
+    Cria o serviço de sessões gravado no arquivo SQLite ``db_path``, aberto na primeira operação.
+
+    Args:
+        db_path (str): Caminho do banco de sessões (o diretório é criado no primeiro uso se não existir).
+        max_sessions (int): Número máximo de sessões mantidas em memória.
+        idle_ttl_seconds (float): Tempo sem atividade após o qual a sessão sai do cache.
+
+    Returns:
+        CachedSessionService: Serviço de sessões persistente com cache.
+    """
+    def open_backend() -> SqliteSessionService:
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        return SqliteSessionService(db_path)
+
+    return CachedSessionService(open_backend, max_sessions=max_sessions, idle_ttl_seconds=idle_ttl_seconds)
@@ -0,0 +1,163 @@
+"""
+Cálculo de horários livres a partir dos intervalos ocupados da agenda.
+
+Em vez de testar cada horário candidato contra todos os intervalos ocupados
+(O(horários x ocupados), reinterpretando as datas a cada teste), os
+intervalos ocupados são interpretados uma única vez, ordenados e mesclados.
+Em seguida o complemento dentro da janela de trabalho (os intervalos livres)
+é percorrido e os horários são recortados de cada intervalo livre.
+
+Todas as funções trabalham com datetimes com fuso horário (aware) e não
+dependem de nenhum serviço externo.
+"""
+
+import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Interval = Tuple[datetime.datetime, datetime.datetime]
+
+
+def parse_iso_datetime(value: str) -> datetime.datetime:
+    """
+    Interpreta um timestamp RFC 3339 retornado pela API do Google Calendar.
+
+    Args:
+        value (str): Timestamp, por exemplo ``2024-05-10T12:00:00Z`` ou ``2024-05-10T09:00:00-03:00``.
+
+    Returns:
+        datetime.datetime: Datetime com fuso horário.
+    """
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def parse_busy(busy: Iterable[Dict[str, str]]) -> List[Interval]:
+    """
+    Converte a lista ``busy`` da resposta de ``freebusy().query`` em intervalos.
+
+    Args:
+        busy (iterable): Itens com as chaves 'start' e 'end'.
+
+    Returns:
+        list: Intervalos (início, fim) ocupados.
+    """
+    return [(parse_iso_datetime(item['start']), parse_iso_datetime(item['end'])) for item in busy]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """
+    Ordena e mescla intervalos sobrepostos ou adjacentes.
+
+    Args:
+        intervals (iterable): Intervalos (início, fim), em qualquer ordem.
+
+    Returns:
+        list: Intervalos disjuntos, ordenados pelo início.
+    """
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_intervals(window_start: datetime.datetime, window_end: datetime.datetime, busy: List[Interval]) -> List[Interval]:
+    """
+    Calcula os intervalos livres dentro da janela (complemento dos ocupados).
+
+    Args:
+        window_start (datetime): Início da janela de trabalho.
+        window_end (datetime): Fim da janela de trabalho.
+        busy (list): Intervalos ocupados já mesclados (veja ``merge_intervals``).
+
+    Returns:
+        list: Intervalos livres, ordenados.
+    """
+    free: List[Interval] = []
+    cursor = window_start
+    for start, end in busy:
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            free.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        free.append((cursor, window_end))
+    return free
+
+
+def cut_slots(free: List[Interval], duration: datetime.timedelta, step: Optional[datetime.timedelta] = None) -> List[datetime.datetime]:
+    """
+    Recorta horários de início de cada intervalo livre.
+
+    Args:
+        free (list): Intervalos livres.
+        duration (timedelta): Duração do compromisso.
+        step (timedelta): Passo entre horários consecutivos (padrão: a própria duração).
+
+    Returns:
+        list: Horários de início em que o compromisso cabe inteiro.
+    """
+    step = step or duration
+    slots: List[datetime.datetime] = []
+    for start, end in free:
+        current = start
+        while current + duration <= end:
+            slots.append(current)
+            current += step
+    return slots
+
+
+def slots_in_window(
+    window_start: datetime.datetime,
+    window_end: datetime.datetime,
+    merged_busy: List[Interval],
+    duration_minutes: int,
+) -> List[datetime.datetime]:
+    """
+    Calcula os horários disponíveis na janela a partir de intervalos ocupados já mesclados.
+
+    Permite interpretar e mesclar a lista ``busy`` uma única vez e reaproveitá-la
+    para várias janelas (por exemplo, vários dias de uma mesma consulta).
+
+    Args:
+        window_start (datetime): Início da janela de trabalho (com fuso horário).
+        window_end (datetime): Fim da janela de trabalho (com fuso horário).
+        merged_busy (list): Intervalos ocupados mesclados (veja ``merge_intervals``).
+        duration_minutes (int): Duração do compromisso em minutos.
+
+    Returns:
+        list: Horários de início disponíveis, no fuso horário de ``window_start``.
+    """
+    if duration_minutes <= 0:
+        raise ValueError("A duração deve ser maior que zero.")
+    tz = window_start.tzinfo
+    free = free_intervals(window_start, window_end, merged_busy)
+    return [slot.astimezone(tz) for slot in cut_slots(free, datetime.timedelta(minutes=duration_minutes))]
+
+
+def available_slots(
+    window_start: datetime.datetime,
+    window_end: datetime.datetime,
+    busy: Iterable[Dict[str, Any]],
+    duration_minutes: int,
+) -> List[datetime.datetime]:
+    """
+    Calcula os horários disponíveis na janela a partir da lista ``busy`` do freebusy.
+
+    Args:
+        window_start (datetime): Início da janela de trabalho (com fuso horário).
+        window_end (datetime): Fim da janela de trabalho (com fuso horário).
+        busy (iterable): Itens 'start'/'end' da resposta de ``freebusy().query``.
+        duration_minutes (int): Duração do compromisso em minutos.
+
+    Returns:
+        list: Horários de início disponíveis, no fuso horário de ``window_start``.
+    """
+    return slots_in_window(window_start, window_end, merge_intervals(parse_busy(busy)), duration_minutes)
@@ -0,0 +1,268 @@
+"""
+Implementação em memória de parte da API do Google Calendar, para os testes offline.
+
+Suporta as chamadas usadas pelo agente — ``events().insert`` (com ``id``
+definido pelo cliente), ``events().get``, ``events().delete``,
+``events().list`` (com ``syncToken``, ``pageToken`` e ``showDeleted``),
+``freebusy().query`` e ``new_batch_http_request`` — com a mesma forma de requisição/resposta da API real
+(cada chamada retorna um objeto com ``execute()``). Permite exercitar o espelho
+local (calendar_sync.py) e as ferramentas sem credenciais nem rede, inclusive
+a expiração do token de sincronização (HTTP 410) e erros transitórios
+(``inject_errors``) para as retentativas (retry.py).
+"""
+
+import datetime
+import itertools
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+import httplib2
+import pytz
+from googleapiclient.errors import HttpError
+
+from support import load
+
+_slots = load('slots')
+merge_intervals = _slots.merge_intervals
+parse_iso_datetime = _slots.parse_iso_datetime
+
+
+class _Request:
+    """
+    Requisição adiada, no mesmo formato das requisições do googleapiclient.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+
+    def execute(self, num_retries: int = 0) -> Any:
+        return self._fn(*self._args, **self._kwargs)
+
+
+def _http_error(status: int, reason: str, message: str) -> HttpError:
+    content = json.dumps({"error": {"code": status, "message": message, "errors": [{"reason": reason}]}})
+    return HttpError(httplib2.Response({'status': status}), content.encode('utf-8'))
+
+
+class FakeCalendarService:
+    """
+    Calendários em memória com log de alterações para sincronização incremental.
+    """
+
+    def __init__(self, calendar_ids=('primary',), page_size: int = 250):
+        """
+        Args:
+            calendar_ids (iterable): Ids dos calendários disponíveis.
+            page_size (int): Número máximo de eventos por página em ``events().list``.
+        """
+        self.page_size = page_size
+        self._calendars: Dict[str, Dict[str, Dict[str, Any]]] = {calendar_id: {} for calendar_id in calendar_ids}
+        self._changes: Dict[str, Dict[str, int]] = {calendar_id: {} for calendar_id in calendar_ids}
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._token_epoch = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._injected: List[HttpError] = []
+        self.calls: List[str] = []
+
+    # Interface compatível com o googleapiclient
+
+    def events(self) -> "FakeCalendarService":
+        return self
+
+    def freebusy(self) -> "_FreeBusy":
+        return _FreeBusy(self)
+
+    def new_batch_http_request(self, callback=None) -> "_BatchRequest":
+        return _BatchRequest(self, callback)
+
+    def insert(self, calendarId: str, body: Dict[str, Any], sendNotifications: Optional[bool] = None, **kwargs) -> _Request:
+        return _Request(self._insert, calendarId, body)
+
+    def get(self, calendarId: str, eventId: str, **kwargs) -> _Request:
+        return _Request(self._get, calendarId, eventId)
+
+    def delete(self, calendarId: str, eventId: str, **kwargs) -> _Request:
+        return _Request(self._delete, calendarId, eventId)
+
+    def list(self, calendarId: str, syncToken: Optional[str] = None, pageToken: Optional[str] = None,
+             showDeleted: bool = False, **kwargs) -> _Request:
+        return _Request(self._list, calendarId, syncToken, pageToken, showDeleted)
+
+    # Utilitários para simular alterações externas
+
+    def expire_sync_tokens(self) -> None:
+        """
+        Invalida todos os tokens emitidos; o próximo ``list`` com token retorna HTTP 410.
+        """
+        with self._lock:
+            self._token_epoch += 1
+
+    def inject_errors(self, status: int, reason: str, count: int = 1) -> None:
+        """
+        Faz as próximas ``count`` chamadas (de qualquer tipo) falharem com o erro HTTP informado.
+
+        Args:
+            status (int): Código HTTP (ex.: 429 ou 503).
+            reason (str): Motivo do erro (ex.: 'rateLimitExceeded').
+            count (int): Número de chamadas que falham.
+        """
+        with self._lock:
+            self._injected.extend(_http_error(status, reason, 'Injected error') for _ in range(count))
+
+    def _raise_injected(self) -> None:
+        if self._injected:
+            raise self._injected.pop(0)
+
+    def _insert(self, calendar_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.calls.append('events.insert')
+            self._raise_injected()
+            calendar = self._get_calendar(calendar_id)
+            event_id = body.get('id') or f"evt{next(self._ids)}"
+            if event_id in calendar:
+                raise _http_error(409, 'duplicate', 'The requested identifier already exists.')
+            event = dict(body, id=event_id, status='confirmed',
+                         htmlLink=f"https://calendar.example/{calendar_id}/{event_id}")
+            for key in ('start', 'end'):
+                if key in event:
+                    event[key] = _normalize_time(event[key])
+            calendar[event_id] = event
+            self._record_change(calendar_id, event_id)
+            return dict(event)
+
+    def _get(self, calendar_id: str, event_id: str) -> Dict[str, Any]:
+        with self._lock:
+            self.calls.append('events.get')
+            self._raise_injected()
+            event = self._get_calendar(calendar_id).get(event_id)
+            if event is None:
+                raise _http_error(404, 'notFound', 'Not Found')
+            return dict(event)
+
+    def _delete(self, calendar_id: str, event_id: str) -> None:
+        with self._lock:
+            self.calls.append('events.delete')
+            self._raise_injected()
+            event = self._get_calendar(calendar_id).get(event_id)
+            if event is None or event.get('status') == 'cancelled':
+                raise _http_error(404, 'notFound', 'Not Found')
+            event['status'] = 'cancelled'
+            self._record_change(calendar_id, event_id)
+
+    def _list(self, calendar_id: str, sync_token: Optional[str], page_token: Optional[str], show_deleted: bool) -> Dict[str, Any]:
+        with self._lock:
+            self.calls.append('events.list')
+            self._raise_injected()
+            calendar = self._get_calendar(calendar_id)
+            if sync_token is not None:
+                epoch, since = (int(part) for part in sync_token.split(':'))
+                if epoch != self._token_epoch:
+                    raise _http_error(410, 'fullSyncRequired', 'Sync token is no longer valid, a full sync is required.')
+                changed = sorted(
+                    (seq, event_id) for event_id, seq in self._changes[calendar_id].items() if seq > since
+                )
+                items = [dict(calendar[event_id]) for _, event_id in changed]
+            else:
+                items = [
+                    dict(event) for event in calendar.values()
+                    if show_deleted or event.get('status') != 'cancelled'
+                ]
+
+            offset = int(page_token) if page_token else 0
+            page = items[offset:offset + self.page_size]
+            response: Dict[str, Any] = {"items": page}
+            if offset + self.page_size < len(items):
+                response["nextPageToken"] = str(offset + self.page_size)
+            else:
+                response["nextSyncToken"] = f"{self._token_epoch}:{self._last_seq}"
+            return response
+
+    def _freebusy(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.calls.append('freebusy.query')
+            self._raise_injected()
+            time_min = parse_iso_datetime(body['timeMin'])
+            time_max = parse_iso_datetime(body['timeMax'])
+            calendars = {}
+            for item in body.get('items', []):
+                intervals = []
+                for event in self._get_calendar(item['id']).values():
+                    if event.get('status') == 'cancelled' or 'dateTime' not in event.get('start', {}):
+                        continue
+                    start = parse_iso_datetime(event['start']['dateTime'])
+                    end = parse_iso_datetime(event['end']['dateTime'])
+                    if start < time_max and end > time_min:
+                        intervals.append((max(start, time_min), min(end, time_max)))
+                calendars[item['id']] = {"busy": [
+                    {"start": _to_utc_string(start), "end": _to_utc_string(end)}
+                    for start, end in merge_intervals(intervals)
+                ]}
+            return {"calendars": calendars}
+
+    def _get_calendar(self, calendar_id: str) -> Dict[str, Dict[str, Any]]:
+        calendar = self._calendars.get(calendar_id)
+        if calendar is None:
+            raise _http_error(404, 'notFound', 'Not Found')
+        return calendar
+
+    def _record_change(self, calendar_id: str, event_id: str) -> None:
+        self._last_seq = next(self._seq)
+        self._changes[calendar_id][event_id] = self._last_seq
+
+
+class _FreeBusy:
+    def __init__(self, service: FakeCalendarService):
+        self._service = service
+
+    def query(self, body: Dict[str, Any]) -> _Request:
+        return _Request(self._service._freebusy, body)
+
+
+class _BatchRequest:
+    """
+    Lote de requisições, no mesmo formato de ``googleapiclient.http.BatchHttpRequest``.
+    """
+
+    def __init__(self, service: FakeCalendarService, callback=None):
+        self._service = service
+        self._callback = callback
+        self._requests: List[tuple] = []
+
+    def add(self, request: _Request, callback=None, request_id: Optional[str] = None) -> None:
+        request_id = request_id if request_id is not None else str(len(self._requests) + 1)
+        self._requests.append((request_id, request, callback))
+
+    def execute(self) -> None:
+        with self._service._lock:
+            self._service.calls.append('batch')
+        for request_id, request, callback in self._requests:
+            response, exception = None, None
+            try:
+                response = request.execute()
+            except HttpError as e:
+                exception = e
+            for handler in (callback, self._callback):
+                if handler is not None:
+                    handler(request_id, response, exception)
+
+
+def _to_utc_string(value: datetime.datetime) -> str:
+    return value.astimezone(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _normalize_time(value: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Completa um ``dateTime`` sem fuso com o ``timeZone`` informado, como a API real faz.
+    """
+    value = dict(value)
+    if 'dateTime' in value:
+        parsed = parse_iso_datetime(value['dateTime'])
+        if parsed.tzinfo is None:
+            parsed = pytz.timezone(value.get('timeZone', 'UTC')).localize(parsed)
+        value['dateTime'] = parsed.isoformat()
+    return value
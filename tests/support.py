@@ -0,0 +1,60 @@
+"""
+Utilitários dos testes.
+
+Os módulos do agente usam importações relativas, então são carregados como
+parte do pacote (o diretório acima de ``tests``, qualquer que seja o seu nome).
+Execute a partir do diretório do pacote com ``python -m unittest discover tests``.
+"""
+
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+from typing import Tuple
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = os.path.basename(PACKAGE_DIR)
+
+if os.path.dirname(PACKAGE_DIR) not in sys.path:
+    sys.path.insert(0, os.path.dirname(PACKAGE_DIR))
+
+
+def load(module: str):
+    """
+    Importa um módulo do pacote.
+
+    Args:
+        module (str): Nome do módulo (ex.: 'slots').
+
+    Returns:
+        module: Módulo importado.
+    """
+    return importlib.import_module(f"{PACKAGE}.{module}")
+
+
+OPENSSL = shutil.which('openssl')
+
+
+def self_signed_certificate(directory: str, name: str, common_name: str = '127.0.0.1') -> Tuple[str, str]:
+    """
+    Gera um certificado autoassinado (válido para 127.0.0.1) com o ``openssl``.
+
+    Args:
+        directory (str): Diretório onde os arquivos são gravados.
+        name (str): Prefixo dos arquivos.
+        common_name (str): Nome comum do certificado.
+
+    Returns:
+        tuple: (arquivo do certificado, arquivo da chave).
+    """
+    cert = os.path.join(directory, f"{name}.pem")
+    key = os.path.join(directory, f"{name}.key")
+    subprocess.run(
+        [OPENSSL, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-keyout', key, '-out', cert, '-subj', f'/CN={common_name}',
+         '-addext', 'subjectAltName=IP:127.0.0.1'],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
@@ -0,0 +1,235 @@
+"""
+Espelho local da agenda (calendar_sync.py) contra o ``FakeCalendarService``.
+
+Cobre a sincronização completa e incremental, a paginação de ``events().list``,
+a ressincronização após o token expirar (HTTP 410) e a disponibilidade do
+agente respondida pelo espelho (CALENDAR_SYNC_ENABLED).
+"""
+
+import datetime
+import unittest
+from unittest import mock
+
+import pytz
+from googleapiclient.errors import HttpError
+
+import fake_calendar
+from support import load
+
+calendar_sync = load('calendar_sync')
+
+TZ = pytz.timezone('America/Sao_Paulo')
+DAY = datetime.date(2030, 1, 7)
+
+
+def at(hour: int, minute: int = 0, day: datetime.date = DAY) -> datetime.datetime:
+    return TZ.localize(datetime.datetime.combine(day, datetime.time(hour, minute)))
+
+
+def add_event(service, start: datetime.datetime, end: datetime.datetime, calendar_id: str = 'primary') -> str:
+    body = {"summary": "Serviço", "start": {"dateTime": start.isoformat()}, "end": {"dateTime": end.isoformat()}}
+    return service.events().insert(calendarId=calendar_id, body=body).execute()['id']
+
+
+class CalendarSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = fake_calendar.FakeCalendarService()
+        self.sync = calendar_sync.CalendarSync(calendar_sync.CalendarEventStore(TZ))
+
+    def busy(self):
+        return self.sync.store.busy_intervals(at(0), at(23, 59))
+
+    def test_full_then_incremental_sync(self):
+        add_event(self.service, at(9), at(10))
+        self.sync.sync(self.service)
+        self.assertEqual(self.busy(), [(at(9), at(10))])
+
+        event_id = add_event(self.service, at(14), at(15))
+        self.service.events().delete(calendarId='primary', eventId=event_id).execute()
+        add_event(self.service, at(10), at(11))
+        self.sync.sync(self.service)
+
+        self.assertEqual(self.busy(), [(at(9), at(11))])
+        self.assertEqual(self.sync.stats["full_syncs"], 1)
+        self.assertEqual(self.sync.stats["incremental_syncs"], 1)
+        # A sincronização incremental só recebe o que mudou desde a anterior
+        self.assertEqual(self.sync.stats["events_received"], 3)
+
+    def test_full_sync_follows_pages(self):
+        self.service.page_size = 2
+        for hour in (9, 11, 13, 15, 17):
+            add_event(self.service, at(hour), at(hour, 30))
+
+        self.sync.sync(self.service)
+
+        self.assertEqual(len(self.sync.store), 5)
+        self.assertEqual(self.service.calls.count('events.list'), 3)
+
+        for hour in (10, 12, 14):
+            add_event(self.service, at(hour), at(hour, 30))
+        self.sync.sync(self.service)
+        self.assertEqual(len(self.sync.store), 8)
+        self.assertEqual(self.service.calls.count('events.list'), 5)
+
+    def test_expired_token_triggers_full_resync(self):
+        add_event(self.service, at(9), at(10))
+        self.sync.sync(self.service)
+        self.service.expire_sync_tokens()
+        add_event(self.service, at(16), at(17))
+
+        self.sync.sync(self.service)
+
+        self.assertEqual(self.busy(), [(at(9), at(10)), (at(16), at(17))])
+        self.assertEqual(self.sync.stats["token_expired"], 1)
+        self.assertEqual(self.sync.stats["full_syncs"], 2)
+
+        # O token novo volta a permitir sincronização incremental
+        add_event(self.service, at(12), at(13))
+        self.sync.sync(self.service)
+        self.assertEqual(self.sync.stats["incremental_syncs"], 1)
+        self.assertEqual(len(self.sync.store), 3)
+
+    def test_failed_full_sync_keeps_the_current_mirror(self):
+        add_event(self.service, at(9), at(10))
+        self.sync.sync(self.service)
+        self.service.expire_sync_tokens()
+        self.service.page_size = 1
+        add_event(self.service, at(11), at(12))
+        # Primeira chamada: 410; segunda (primeira página da completa) funciona; terceira falha
+        self.service.calls.clear()
+        original_list = self.service._list
+
+        def failing_list(*args):
+            if self.service.calls.count('events.list') == 2:
+                self.service.inject_errors(503, 'backendError')
+            return original_list(*args)
+
+        with mock.patch.object(self.service, '_list', failing_list):
+            with self.assertRaises(HttpError):
+                self.sync.sync(self.service)
+
+        self.assertEqual(self.busy(), [(at(9), at(10))])
+        self.sync.sync(self.service)
+        self.assertEqual(self.busy(), [(at(9), at(10)), (at(11), at(12))])
+
+    def test_events_applied_during_rebuild_are_replayed(self):
+        store = self.sync.store
+        store.apply({"id": "old", "start": {"dateTime": at(8).isoformat()}, "end": {"dateTime": at(9).isoformat()}})
+        fresh = store.begin_rebuild()
+        fresh.apply({"id": "remote", "start": {"dateTime": at(10).isoformat()}, "end": {"dateTime": at(11).isoformat()}})
+        store.apply({"id": "local", "start": {"dateTime": at(14).isoformat()}, "end": {"dateTime": at(15).isoformat()}})
+        # Até a troca, os leitores continuam vendo o espelho antigo (mais o write-through)
+        self.assertEqual(self.busy(), [(at(8), at(9)), (at(14), at(15))])
+
+        store.finish_rebuild(fresh)
+
+        self.assertEqual(self.busy(), [(at(10), at(11)), (at(14), at(15))])
+
+    def test_ensure_fresh_respects_staleness(self):
+        self.sync.ensure_fresh(self.service)
+        self.sync.ensure_fresh(self.service)
+        self.assertEqual(self.service.calls.count('events.list'), 1)
+
+    def test_cancelled_transparent_and_all_day_events(self):
+        store = self.sync.store
+        store.apply({"id": "a", "start": {"date": "2030-01-07"}, "end": {"date": "2030-01-08"}})
+        store.apply({"id": "b", "transparency": "transparent",
+                     "start": {"dateTime": at(9).isoformat()}, "end": {"dateTime": at(10).isoformat()}})
+        # Evento de dia inteiro: da meia-noite local até a do dia seguinte
+        self.assertEqual(store.busy_intervals(at(9), at(18)), [(at(0), at(0, day=DAY + datetime.timedelta(days=1)))])
+
+        store.apply({"id": "a", "status": "cancelled"})
+        self.assertEqual(store.busy_intervals(at(9), at(18)), [])
+        self.assertEqual(len(store), 0)
+
+
+class SyncBackedAvailabilityTest(unittest.TestCase):
+    """
+    Ferramentas do agente com CALENDAR_SYNC_ENABLED: a disponibilidade vem do espelho.
+    """
+
+    def setUp(self):
+        agent = self.agent = load('agent')
+        client_pool = load('client_pool')
+        self.service = fake_calendar.FakeCalendarService(calendar_ids=agent.CALENDAR_IDS)
+        syncs = {
+            calendar_id: calendar_sync.CalendarSync(calendar_sync.CalendarEventStore(TZ), calendar_id=calendar_id)
+            for calendar_id in agent.CALENDAR_IDS
+        }
+        for name, value in (
+            ('CALENDAR_SYNC_ENABLED', True),
+            ('calendar_syncs', syncs),
+            ('freebusy_cache', load('freebusy_cache').FreeBusyCache()),
+            ('calendar_limiter', None),
+            ('_calendar_pool', client_pool.ClientPool(lambda: self.service)),
+        ):
+            patcher = mock.patch.object(agent, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.calendar_id = agent.CALENDAR_IDS[0]
+        for calendar_id in agent.CALENDAR_IDS[1:]:
+            add_event(self.service, at(0), at(23, 59), calendar_id)
+
+    def test_availability_comes_from_the_mirror(self):
+        add_event(self.service, at(10), at(12), self.calendar_id)
+
+        result = self.agent.verificar_disponibilidade_agenda(DAY.isoformat(), 60)
+
+        self.assertEqual(result["status"], "success")
+        slots = result["available_slots"]
+        self.assertIn("09:00", slots)
+        self.assertNotIn("10:00", slots)
+        self.assertNotIn("11:00", slots)
+        self.assertIn("12:00", slots)
+        self.assertNotIn('freebusy.query', self.service.calls)
+
+    def test_booking_syncs_first_and_writes_through(self):
+        self.agent.verificar_disponibilidade_agenda(DAY.isoformat(), 60)
+        # Evento criado fora do agente depois da última sincronização
+        add_event(self.service, at(9), at(10), self.calendar_id)
+        self.service.calls.clear()
+
+        result = self.agent.criar_evento_agenda("Revisão", DAY.isoformat(), "09:00", 60, "", "")
+
+        self.assertEqual(result["status"], "error")
+        self.assertIn('events.list', self.service.calls)
+
+        result = self.agent.criar_evento_agenda("Revisão", DAY.isoformat(), "10:00", 60, "", "")
+        self.assertEqual(result["status"], "success")
+        busy = self.agent.calendar_syncs[self.calendar_id].store.busy_intervals(at(9), at(18))
+        self.assertEqual(busy, [(at(9), at(11))])
+
+    def test_booking_rejects_services_outside_work_hours(self):
+        add_event(self.service, at(18), at(19), self.calendar_id)
+        self.service.calls.clear()
+
+        for hora_inicio, duracao in (("17:30", 60), ("18:15", 30), ("08:30", 60)):
+            result = self.agent.criar_evento_agenda("Revisão", DAY.isoformat(), hora_inicio, duracao, "", "")
+            self.assertEqual(result["status"], "error", hora_inicio)
+            self.assertIn("horário de trabalho", result["error_message"])
+
+        result = self.agent.criar_eventos_agenda_em_lote([
+            {"titulo": "Frota 1", "data_iso": DAY.isoformat(), "hora_inicio": "17:30", "duracao_minutos": 60},
+            {"titulo": "Frota 2", "data_iso": DAY.isoformat(), "hora_inicio": "17:00", "duracao_minutos": 60},
+        ])
+        self.assertEqual([item["status"] for item in result["resultados"]], ["error", "success"])
+        self.assertEqual(self.service.calls.count('events.insert'), 1)
+
+    def test_booking_busy_data_covers_the_whole_service(self):
+        # Evento logo após o fim do expediente: a reserva que passa das 18:00 precisa vê-lo
+        add_event(self.service, at(18), at(19), self.calendar_id)
+        booking = [(at(17, 30), at(18, 30))]
+
+        busy = self.agent._busy_for_booking(self.agent.get_calendar_pool(), booking)
+        self.assertIn((at(18), at(19)), busy[self.calendar_id])
+
+        with mock.patch.object(self.agent, 'CALENDAR_SYNC_ENABLED', False):
+            busy = self.agent._busy_for_booking(self.agent.get_calendar_pool(), booking)
+        # O freebusy recorta a resposta no fim do período consultado (o fim da reserva)
+        self.assertEqual(busy[self.calendar_id], [(at(18), at(18, 30))])
+        self.assertIsNone(self.agent._find_free_calendar(busy, *booking[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Compactação do histórico enviado ao modelo (context_compaction.py).
+"""
+
+import types as pytypes
+import unittest
+
+from google.genai import types
+
+from support import load
+
+context_compaction = load('context_compaction')
+
+BUDGET = 8000
+
+
+def conversation(turns: int, tool_result_chars: int = 3000) -> list:
+    contents = []
+    for index in range(turns):
+        contents.append(types.Content(role="user", parts=[types.Part(
+            text=f"Mensagem {index}: quero agendar a revisão do carro de placa ABC{index:04d} " + "detalhes " * 20
+        )]))
+        contents.append(types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+            name="buscar_historico_cliente", args={"placa_veiculo": f"ABC{index:04d}"}
+        ))]))
+        contents.append(types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+            name="buscar_historico_cliente", response={"status": "success", "historico": "x" * tool_result_chars}
+        ))]))
+        contents.append(types.Content(role="model", parts=[types.Part(text="Encontrei o histórico. " * 10)]))
+    return contents
+
+
+class ContextCompactorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.compactor = context_compaction.ContextCompactor(token_budget=BUDGET)
+
+    def compact(self, contents):
+        request = pytypes.SimpleNamespace(contents=contents)
+        self.compactor(None, request)
+        return request.contents
+
+    def test_short_conversation_is_untouched(self):
+        contents = conversation(2, tool_result_chars=100)
+        self.assertIs(self.compact(contents), contents)
+        self.assertEqual(self.compactor.stats["compacted"], 0)
+
+    def test_long_histories_stay_within_budget(self):
+        sizes = []
+        for turns in (100, 400, 1000):
+            result = self.compact(conversation(turns))
+            tokens = context_compaction.estimate_tokens(result)
+            self.assertLessEqual(tokens, BUDGET, turns)
+            sizes.append(tokens)
+            # O turno atual chega intacto ao modelo
+            self.assertTrue(result[-4].parts[0].text.startswith(f"Mensagem {turns - 1}:"))
+            self.assertEqual(len(result[-2].parts[0].function_response.response["historico"]), 3000)
+        # O tamanho não cresce com a conversa
+        self.assertLess(max(sizes) - min(sizes), BUDGET // 10)
+
+    def test_note_keeps_recent_messages_and_counts_the_rest(self):
+        result = self.compact(conversation(400))
+        note = result[0].parts[0].text
+
+        self.assertTrue(note.startswith("[Histórico compactado:"))
+        self.assertIn("turno(s) mais antigos omitidos)", note)
+        self.assertEqual(note.count("\n- "), self.compactor.note_max_messages)
+        dropped = self.compactor.stats["turns_dropped"]
+        self.assertIn(f"Mensagem {dropped - 1}:", note)
+        self.assertNotIn("Mensagem 0:", note)
+        self.assertLessEqual(context_compaction.estimate_tokens(result[:1]), BUDGET * self.compactor.note_budget_share)
+
+    def test_oversized_current_turn_is_shrunk_to_budget(self):
+        contents = conversation(5) + [
+            types.Content(role="user", parts=[types.Part(text="texto colado " * 5000)]),
+            types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+                name="verificar_disponibilidade_agenda", args={"data_iso": "2030-01-07"}
+            ))]),
+            types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+                name="verificar_disponibilidade_agenda", response={"horarios": ['"09:00"'] * 20000}
+            ))]),
+        ]
+
+        result = self.compact(contents)
+
+        self.assertLessEqual(context_compaction.estimate_tokens(result), BUDGET)
+        self.assertEqual(result[0].parts[0].text[:13], "texto colado ")
+        self.assertTrue(result[2].parts[0].function_response.response["truncado"])
+        self.assertEqual(self.compactor.stats["turns_dropped"], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
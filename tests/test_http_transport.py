@@ -0,0 +1,184 @@
+"""
+Transporte httpx (http_transport.py) contra um servidor HTTPS local.
+
+O servidor usa um certificado autoassinado gerado no início dos testes e
+responde como a API do Calendar (freebusy) e como um endpoint qualquer do
+gspread, para verificar TLS, reaproveitamento de conexões, cabeçalhos,
+descompactação, mapeamento de erros e certificados de cliente (mTLS).
+"""
+
+import gzip
+import json
+import socket
+import ssl
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from support import OPENSSL, load, self_signed_certificate
+
+http_transport = load('http_transport')
+calendar_discovery = load('calendar_discovery')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('content-length', 0))
+        request_body = self.rfile.read(length)
+        if self.path.split('?')[0].endswith('/freeBusy'):
+            payload = {"calendars": {item["id"]: {"busy": []} for item in json.loads(request_body)["items"]}}
+        else:
+            payload = {
+                "path": self.path,
+                "authorization": self.headers.get('authorization'),
+                "client_certificate": bool(self.connection.getpeercert()),
+            }
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        if 'gzip' in self.headers.get('accept-encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('content-encoding', 'gzip')
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_server(cert: str, key: str, client_ca: str = None) -> ThreadingHTTPServer:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    if client_ca is not None:
+        context.verify_mode = ssl.CERT_REQUIRED
+        context.load_verify_locations(client_ca)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@unittest.skipUnless(OPENSSL, "openssl não encontrado para gerar o certificado de teste")
+class HttpxTransportTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.cert, cls.key = self_signed_certificate(cls._tmp.name, 'server')
+        cls.client_cert, cls.client_key = self_signed_certificate(cls._tmp.name, 'client', common_name='autoagenda')
+        cls.server = _start_server(cls.cert, cls.key)
+        cls.base_url = f"https://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls._tmp.cleanup()
+
+    def setUp(self):
+        self.stats = http_transport.TransportStats()
+        self.client = http_transport.create_client(verify=self.cert)
+        self.addCleanup(self.client.close)
+
+    def test_calendar_requests_reuse_one_connection(self):
+        service = calendar_discovery.build_calendar_service(
+            http=http_transport.HttpxHttplib2(self.client, self.stats)
+        )
+        service._baseUrl = f"{self.base_url}/calendar/v3/"
+        body = {"timeMin": "2030-01-01T09:00:00Z", "timeMax": "2030-01-01T18:00:00Z", "items": [{"id": "box1"}]}
+
+        for _ in range(3):
+            result = service.freebusy().query(body=body).execute()
+            self.assertEqual(result, {"calendars": {"box1": {"busy": []}}})
+
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot["requests"], 3)
+        self.assertEqual(snapshot["connections_opened"], 1)
+        self.assertEqual(snapshot["connections_reused"], 2)
+
+    def test_requests_adapter_passes_headers_and_decodes_body(self):
+        session = requests.Session()
+        session.mount('https://', http_transport.HttpxAdapter(self.client, self.stats))
+
+        response = session.get(f"{self.base_url}/v4/spreadsheets/abc", headers={"Authorization": "Bearer token"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('content-encoding', response.headers)
+        self.assertEqual(response.json()["authorization"], "Bearer token")
+        self.assertEqual(response.json()["path"], "/v4/spreadsheets/abc")
+
+    def test_untrusted_certificate_is_rejected(self):
+        client = http_transport.create_client()
+        self.addCleanup(client.close)
+        http = http_transport.HttpxHttplib2(client, self.stats)
+
+        with self.assertRaises(ConnectionError):
+            http.request(f"{self.base_url}/", "GET")
+        self.assertEqual(self.stats.snapshot()["errors"], 1)
+
+    def test_connection_errors_are_mapped(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            closed_port = probe.getsockname()[1]
+        session = requests.Session()
+        session.mount('https://', http_transport.HttpxAdapter(self.client, self.stats))
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.get(f"https://127.0.0.1:{closed_port}/")
+
+    def test_add_certificate_uses_client_certificate_for_domain(self):
+        server = _start_server(self.cert, self.key, client_ca=self.client_cert)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"https://127.0.0.1:{server.server_port}/"
+        http = http_transport.HttpxHttplib2(
+            self.client, self.stats,
+            client_factory=lambda **kwargs: http_transport.create_client(verify=self.cert, **kwargs)
+        )
+        self.addCleanup(http.close)
+
+        with self.assertRaises(ConnectionError):
+            http.request(url, "GET")
+
+        http.add_certificate(self.client_key, self.client_cert, f"127.0.0.1:{server.server_port}")
+        response, content = http.request(url, "GET")
+        self.assertEqual(response.status, 200)
+        self.assertTrue(json.loads(content)["client_certificate"])
+
+        # Outros domínios continuam no cliente compartilhado, sem certificado
+        response, content = http.request(f"{self.base_url}/", "GET")
+        self.assertFalse(json.loads(content)["client_certificate"])
+
+
+
+class CreateClientTest(unittest.TestCase):
+
+    @unittest.skipUnless(http_transport.HTTP2_AVAILABLE, "pacote h2 não instalado")
+    def test_http2_is_enabled_when_h2_is_installed(self):
+        client = http_transport.create_client()
+        self.addCleanup(client.close)
+        self.assertTrue(client._transport._pool._http2)
+
+    def test_missing_h2_is_logged(self):
+        with mock.patch.object(http_transport, 'HTTP2_AVAILABLE', False):
+            with self.assertLogs(http_transport.logger, 'WARNING') as logs:
+                client = http_transport.create_client()
+            self.addCleanup(client.close)
+            self.assertIn("h2", logs.output[0])
+            self.assertFalse(client._transport._pool._http2)
+
+            with self.assertNoLogs(http_transport.logger, 'WARNING'):
+                http_transport.create_client(http2=False).close()
+
+
+if __name__ == '__main__':
+    unittest.main()
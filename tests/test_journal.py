@@ -0,0 +1,74 @@
+"""
+Journal local das linhas pendentes (journal.py).
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from support import load
+
+journal = load('journal')
+
+
+class WriteJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, 'dados', 'journal.jsonl')
+
+    def reopen(self) -> "journal.WriteJournal":
+        instance = journal.WriteJournal(self.path)
+        self.addCleanup(instance.close)
+        return instance
+
+    def test_creates_nothing_until_first_use(self):
+        self.reopen()
+        self.assertFalse(os.path.exists(os.path.dirname(self.path)))
+
+    def test_unacked_rows_are_replayed_after_restart(self):
+        first = self.reopen()
+        first.append('a', ['Maria', 'ABC1234'])
+        first.append('b', ['João', 'XYZ9876'])
+        first.ack(['a'])
+
+        self.assertEqual(self.reopen().pending(), [('b', ['João', 'XYZ9876'])])
+
+    def test_torn_tail_does_not_swallow_the_next_record(self):
+        first = self.reopen()
+        first.append('a', ['Maria'])
+        with open(self.path, 'a', encoding='utf-8') as f:
+            # Processo interrompido no meio da escrita do registro 'b'
+            f.write('{"op": "append", "id": "b", "ro')
+
+        second = journal.WriteJournal(self.path)
+        with self.assertLogs(journal.logger, 'WARNING'):
+            self.assertEqual(second.pending(), [('a', ['Maria'])])
+        second.append('c', ['Ana'])
+        second._file.close()
+
+        third = self.reopen()
+        self.assertEqual(third.pending(), [('a', ['Maria']), ('c', ['Ana'])])
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)["id"] for line in f], ['a', 'c'])
+
+        third.ack(['a', 'c'])
+        self.assertEqual(self.reopen().pending(), [])
+
+    def test_compaction_keeps_only_pending_rows(self):
+        instance = journal.WriteJournal(self.path, compact_after=2)
+        self.addCleanup(instance.close)
+        for row_id in 'abc':
+            instance.append(row_id, [row_id])
+        instance.ack(['a', 'b'])
+
+        with open(self.path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(entries, [{"op": "append", "id": "c", "row": ["c"]}])
+        self.assertEqual(self.reopen().pending(), [('c', ['c'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
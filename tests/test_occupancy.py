@@ -0,0 +1,97 @@
+"""
+Bitmaps de ocupação (occupancy.py) comparados ao cálculo por intervalos (slots.py).
+"""
+
+import datetime
+import random
+import unittest
+
+import pytz
+
+from support import load
+
+occupancy = load('occupancy')
+slots = load('slots')
+
+TZ = pytz.timezone('America/Sao_Paulo')
+GRANULARITY = 15
+WORK_START = datetime.time(9, 0)
+WORK_END = datetime.time(18, 0)
+
+
+def work_window(day: datetime.date):
+    return (
+        TZ.localize(datetime.datetime.combine(day, WORK_START)),
+        TZ.localize(datetime.datetime.combine(day, WORK_END)),
+    )
+
+
+def interval_slots(windows, busy_by_day, duration_minutes):
+    """
+    Horários em que ao menos um box está livre, pelo cálculo por intervalos (como no agente).
+    """
+    result = []
+    for (window_start, window_end), busy_by_calendar in zip(windows, busy_by_day):
+        available = set()
+        for busy in busy_by_calendar.values():
+            available.update(slots.slots_in_window(window_start, window_end, busy, duration_minutes))
+        result.append(sorted(available))
+    return result
+
+
+def random_busy(rng: random.Random, day: datetime.date, calendar_ids):
+    """
+    Intervalos ocupados alinhados à granularidade, alguns atravessando o início ou o fim do expediente.
+    """
+    midnight = TZ.localize(datetime.datetime.combine(day, datetime.time()))
+    busy_by_calendar = {}
+    for calendar_id in calendar_ids:
+        intervals = []
+        for _ in range(rng.randint(0, 6)):
+            start_cell = rng.randint(8 * 4, 19 * 4)
+            length = rng.randint(1, 12)
+            intervals.append((
+                midnight + datetime.timedelta(minutes=start_cell * GRANULARITY),
+                midnight + datetime.timedelta(minutes=(start_cell + length) * GRANULARITY),
+            ))
+        busy_by_calendar[calendar_id] = slots.merge_intervals(intervals)
+    return busy_by_calendar
+
+
+class OccupancyEquivalenceTest(unittest.TestCase):
+
+    def test_matches_interval_engine_on_random_grid_aligned_cases(self):
+        rng = random.Random(20240513)
+        first_day = datetime.date(2030, 1, 7)
+        for case in range(3000):
+            days = [first_day + datetime.timedelta(days=offset) for offset in range(rng.randint(1, 5))]
+            calendar_ids = [f"box{index}" for index in range(rng.randint(1, 3))]
+            windows = [work_window(day) for day in days]
+            busy_by_day = [random_busy(rng, day, calendar_ids) for day in days]
+            duration = GRANULARITY * rng.randint(1, 16)
+
+            expected = interval_slots(windows, busy_by_day, duration)
+            actual = occupancy.slots_for_days(windows, busy_by_day, duration, GRANULARITY)
+
+            self.assertEqual(actual, expected, f"caso {case}: duração {duration}, ocupados {busy_by_day}")
+
+    def test_unaligned_busy_end_frees_the_next_cell(self):
+        window = work_window(datetime.date(2030, 1, 7))
+        busy = {"box0": [(window[0], window[0] + datetime.timedelta(minutes=67))]}
+
+        result = occupancy.slots_for_days([window], [busy], 60, GRANULARITY)
+
+        self.assertEqual(result[0][0], window[0] + datetime.timedelta(minutes=75))
+
+    def test_duration_must_be_a_multiple_of_the_granularity(self):
+        window = work_window(datetime.date(2030, 1, 7))
+        with self.assertRaises(ValueError):
+            occupancy.slots_for_days([window], [{}], 50, GRANULARITY)
+
+    def test_duration_longer_than_the_day(self):
+        window = work_window(datetime.date(2030, 1, 7))
+        self.assertEqual(occupancy.slots_for_days([window], [{"box0": []}], 600, GRANULARITY), [[]])
+
+
+if __name__ == '__main__':
+    unittest.main()
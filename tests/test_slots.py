@@ -0,0 +1,90 @@
+"""
+Cálculo de horários livres (slots.py).
+"""
+
+import datetime
+import unittest
+
+import pytz
+
+from support import load
+
+slots = load('slots')
+
+TZ = pytz.timezone('America/Sao_Paulo')
+
+
+def at(hour: int, minute: int = 0) -> datetime.datetime:
+    return TZ.localize(datetime.datetime(2030, 1, 7, hour, minute))
+
+
+class ParseTest(unittest.TestCase):
+
+    def test_parse_iso_datetime_accepts_z_and_offsets(self):
+        self.assertEqual(slots.parse_iso_datetime('2030-01-07T12:00:00Z'), at(9))
+        self.assertEqual(slots.parse_iso_datetime('2030-01-07T09:00:00-03:00'), at(9))
+        self.assertIsNotNone(slots.parse_iso_datetime('2030-01-07T12:00:00Z').tzinfo)
+
+    def test_parse_busy(self):
+        busy = [{"start": "2030-01-07T13:00:00Z", "end": "2030-01-07T14:00:00Z"}]
+        self.assertEqual(slots.parse_busy(busy), [(at(10), at(11))])
+
+
+class MergeIntervalsTest(unittest.TestCase):
+
+    def test_merges_overlapping_and_adjacent_intervals_in_any_order(self):
+        intervals = [(at(14), at(15)), (at(9), at(10)), (at(9, 30), at(11)), (at(11), at(12))]
+        self.assertEqual(slots.merge_intervals(intervals), [(at(9), at(12)), (at(14), at(15))])
+
+    def test_keeps_contained_interval_inside_the_outer_one(self):
+        self.assertEqual(slots.merge_intervals([(at(9), at(12)), (at(10), at(11))]), [(at(9), at(12))])
+
+    def test_drops_empty_intervals(self):
+        self.assertEqual(slots.merge_intervals([(at(10), at(10)), (at(11), at(10))]), [])
+
+
+class FreeIntervalsTest(unittest.TestCase):
+
+    def test_complement_inside_the_window(self):
+        busy = [(at(7), at(9)), (at(10), at(11)), (at(17), at(19))]
+        self.assertEqual(
+            slots.free_intervals(at(8), at(18), busy),
+            [(at(9), at(10)), (at(11), at(17))]
+        )
+
+    def test_whole_window_is_free_without_busy_intervals(self):
+        self.assertEqual(slots.free_intervals(at(8), at(18), []), [(at(8), at(18))])
+
+    def test_fully_busy_window(self):
+        self.assertEqual(slots.free_intervals(at(8), at(18), [(at(7), at(19))]), [])
+
+
+class SlotsTest(unittest.TestCase):
+
+    def test_cut_slots_only_where_the_whole_duration_fits(self):
+        free = [(at(8), at(9, 30)), (at(10), at(10, 45)), (at(11), at(11, 20))]
+        self.assertEqual(slots.cut_slots(free, datetime.timedelta(minutes=30)), [at(8), at(8, 30), at(9), at(10)])
+
+    def test_cut_slots_with_step(self):
+        free = [(at(8), at(9))]
+        self.assertEqual(
+            slots.cut_slots(free, datetime.timedelta(minutes=30), datetime.timedelta(minutes=15)),
+            [at(8), at(8, 15), at(8, 30)]
+        )
+
+    def test_available_slots_from_freebusy_response(self):
+        busy = [
+            {"start": "2030-01-07T12:00:00Z", "end": "2030-01-07T13:00:00Z"},
+            {"start": "2030-01-07T12:30:00Z", "end": "2030-01-07T14:00:00Z"},
+        ]
+        result = slots.available_slots(at(8), at(12), busy, 60)
+        self.assertEqual(result, [at(8), at(11)])
+        self.assertEqual(result[0].utcoffset(), at(8).utcoffset())
+
+    def test_rejects_non_positive_duration(self):
+        with self.assertRaises(ValueError):
+            slots.slots_in_window(at(8), at(18), [], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Cache do handle da worksheet do Google Sheets compartilhado entre as ferramentas.
+
+``gc.open_by_key(SHEET_ID).sheet1`` faz ao menos uma requisição de metadados
+antes de qualquer leitura ou escrita. O handle é reaproveitado entre as
+chamadas das ferramentas até expirar (``ttl_seconds``) ou ser invalidado
+após um erro da API (planilha removida, permissões alteradas, etc.).
+"""
+
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class WorksheetCache:
+    """
+    Guarda o handle da worksheet aberta e conta quantas aberturas foram evitadas.
+    """
+
+    def __init__(self, open_worksheet: Callable[[], Any], ttl_seconds: float = 600.0):
+        """
+        Args:
+            open_worksheet (callable): Função que abre a worksheet (faz a requisição de metadados).
+            ttl_seconds (float): Tempo em segundos até o handle ser reaberto.
+        """
+        self._open_worksheet = open_worksheet
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"metadata_fetches": 0, "metadata_fetches_avoided": 0, "invalidations": 0}
+        self._worksheet: Optional[Any] = None
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        """
+        Retorna a worksheet em cache, abrindo-a novamente se necessário.
+
+        Returns:
+            gspread.Worksheet: Handle da worksheet.
+        """
+        with self._lock:
+            if self._worksheet is not None and time.monotonic() - self._opened_at < self.ttl_seconds:
+                self.stats["metadata_fetches_avoided"] += 1
+                return self._worksheet
+
+            self._worksheet = self._open_worksheet()
+            self._opened_at = time.monotonic()
+            self.stats["metadata_fetches"] += 1
+            return self._worksheet
+
+    def invalidate(self) -> None:
+        """
+        Descarta o handle em cache (usado após erros da API do Google Sheets).
+        """
+        with self._lock:
+            if self._worksheet is not None:
+                self.stats["invalidations"] += 1
+            self._worksheet = None
@@ -0,0 +1,290 @@
+"""
+Fila write-behind para as linhas gravadas na planilha do Google Sheets.
+
+Cada ``append_row`` é uma requisição HTTP e consome a cota de escrita da API.
+Nos horários de pico várias sessões agendam ao mesmo tempo, então as linhas
+são enfileiradas localmente e gravadas em lote com uma única chamada
+``append_rows`` a cada ``flush_interval`` segundos (ou quando o lote enche).
+
+A ferramenta retorna assim que a linha está na fila. O resultado de cada
+linha ("pending", "written" ou "failed") fica disponível em ``outcome()``.
+Linhas cujo lote falhou permanecem na fila e são reenviadas, com backoff
+exponencial entre as tentativas (de ``backoff_base`` até ``max_backoff``
+segundos). Falhas transitórias (``is_transient``, ex.: cota ou indisponibilidade
+da API) mantêm as linhas pendentes pelo tempo que for preciso; as demais falhas
+marcam a linha como "failed" após ``max_attempts`` tentativas. A fila é
+esvaziada no encerramento do processo.
+
+Com um ``WriteJournal`` (veja journal.py), cada linha é gravada em disco antes
+de entrar na fila e ``recover()`` reenfileira, na inicialização, as linhas que
+não chegaram a ser confirmadas na planilha. Linhas marcadas como "failed"
+continuam no journal e são reenviadas na próxima inicialização.
+"""
+
+import atexit
+import collections
+import logging
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de resultados de linhas já finalizadas mantidos em memória
+MAX_OUTCOMES = 1000
+
+
+class SheetWriteQueue:
+    """
+    Agrupa as linhas a serem acrescentadas na planilha e as grava em lote.
+    """
+
+    def __init__(
+        self,
+        get_worksheet: Callable[[], Any],
+        flush_interval: float = 2.0,
+        max_batch: int = 50,
+        max_attempts: int = 5,
+        journal: Optional[Any] = None,
+        on_flushed: Optional[Callable[[List[str]], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        rate_limiter: Optional[Any] = None,
+        is_transient: Optional[Callable[[Exception], bool]] = None,
+        backoff_base: float = 1.0,
+        max_backoff: float = 300.0,
+    ):
+        """
+        Args:
+            get_worksheet (callable): Retorna a worksheet onde as linhas serão gravadas.
+            flush_interval (float): Janela (em segundos) para agrupar linhas antes de gravar.
+            max_batch (int): Número máximo de linhas por chamada ``append_rows``.
+            max_attempts (int): Tentativas por linha antes de marcá-la como "failed".
+            journal (WriteJournal): Journal durável das linhas pendentes (opcional).
+            on_flushed (callable): Chamado com os ids das linhas gravadas com sucesso.
+            on_error (callable): Chamado com a exceção quando a gravação de um lote falha.
+            rate_limiter (TokenBucket): Limitador de taxa da API (opcional); a thread de
+                gravação espera a sua vez em vez de descartar o lote.
+            is_transient (callable): Indica se um erro é transitório; as linhas continuam
+                pendentes sem contar para ``max_attempts`` (None = todo erro conta).
+            backoff_base (float): Espera (em segundos) após a primeira falha; dobra a cada falha seguida.
+            max_backoff (float): Limite (em segundos) da espera entre tentativas após falhas.
+        """
+        self._get_worksheet = get_worksheet
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_attempts = max_attempts
+        self.journal = journal
+        self._on_flushed = on_flushed
+        self._on_error = on_error
+        self.rate_limiter = rate_limiter
+        self._is_transient = is_transient
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+
+        self.stats = {"enqueued": 0, "recovered": 0, "written": 0, "failed": 0, "batches": 0, "batch_errors": 0, "backoff_seconds": 0.0}
+        self._pending: "collections.OrderedDict[str, List[Any]]" = collections.OrderedDict()
+        self._outcomes: "collections.OrderedDict[str, Dict[str, Any]]" = collections.OrderedDict()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, row: List[Any]) -> str:
+        """
+        Coloca uma linha na fila de gravação.
+
+        Args:
+            row (list): Valores da linha, na ordem das colunas da planilha.
+
+        Returns:
+            str: Identificador da linha, usado para consultar o resultado.
+        """
+        row_id = uuid.uuid4().hex
+        if self.journal is not None:
+            # Durável em disco antes de ser considerada enfileirada
+            self.journal.append(row_id, row)
+        with self._cond:
+            self._pending[row_id] = list(row)
+            self._set_outcome(row_id, {"status": "pending", "attempts": 0, "error": None})
+            self.stats["enqueued"] += 1
+            self._ensure_worker()
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        return row_id
+
+    def recover(self) -> int:
+        """
+        Reenfileira as linhas do journal que ainda não foram confirmadas na planilha.
+
+        Returns:
+            int: Número de linhas recuperadas.
+        """
+        if self.journal is None:
+            return 0
+        recovered = 0
+        with self._cond:
+            for row_id, row in self.journal.pending():
+                if row_id in self._pending:
+                    continue
+                self._pending[row_id] = list(row)
+                self._set_outcome(row_id, {"status": "pending", "attempts": 0, "error": None})
+                recovered += 1
+            self.stats["recovered"] += recovered
+            if recovered:
+                self._ensure_worker()
+                self._cond.notify()
+        return recovered
+
+    def outcome(self, row_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna o resultado da gravação de uma linha.
+
+        Args:
+            row_id (str): Identificador retornado por ``enqueue``.
+
+        Returns:
+            dict: Status ("pending", "written" ou "failed"), tentativas e último erro,
+                  ou None se o id for desconhecido.
+        """
+        with self._cond:
+            outcome = self._outcomes.get(row_id)
+            return dict(outcome) if outcome else None
+
+    def pending_count(self) -> int:
+        """
+        Returns:
+            int: Número de linhas ainda não gravadas.
+        """
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Grava imediatamente as linhas pendentes, em lotes de até ``max_batch``.
+
+        Returns:
+            dict: Resultado de cada linha processada neste flush (id -> resultado).
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = list(self._pending.items())[:self.max_batch]
+                if not batch:
+                    break
+                batch_results = self._write_batch(batch)
+                results.update(batch_results)
+                if any(result["status"] == "pending" for result in batch_results.values()):
+                    # O lote falhou; as linhas continuam na fila para o próximo ciclo
+                    break
+        return results
+
+    def close(self) -> None:
+        """
+        Encerra a thread de gravação e grava o que ainda estiver na fila.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 30)
+        self.flush()
+        if self.journal is not None:
+            self.journal.close()
+
+    def _write_batch(self, batch: List[Any]) -> Dict[str, Dict[str, Any]]:
+        row_ids = [row_id for row_id, _ in batch]
+        rows = [row for _, row in batch]
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(timeout=float('inf'))
+            self._get_worksheet().append_rows(rows)
+        except Exception as e:
+            logger.warning("Falha ao gravar lote de %d linha(s) na planilha: %s", len(rows), e)
+            if self._on_error:
+                self._on_error(e)
+            transient = self._is_transient is not None and self._is_transient(e)
+            results = {}
+            with self._cond:
+                self.stats["batch_errors"] += 1
+                for row_id in row_ids:
+                    outcome = self._outcomes.get(row_id, {"attempts": 0})
+                    attempts = outcome["attempts"] + 1
+                    if attempts >= self.max_attempts and not transient:
+                        self._pending.pop(row_id, None)
+                        status = "failed"
+                        self.stats["failed"] += 1
+                    else:
+                        status = "pending"
+                    results[row_id] = {"status": status, "attempts": attempts, "error": str(e)}
+                    self._set_outcome(row_id, results[row_id])
+            return results
+
+        if self.journal is not None:
+            self.journal.ack(row_ids)
+
+        results = {}
+        with self._cond:
+            self.stats["batches"] += 1
+            self.stats["written"] += len(rows)
+            for row_id in row_ids:
+                self._pending.pop(row_id, None)
+                attempts = self._outcomes.get(row_id, {"attempts": 0})["attempts"] + 1
+                results[row_id] = {"status": "written", "attempts": attempts, "error": None}
+                self._set_outcome(row_id, results[row_id])
+        if self._on_flushed:
+            self._on_flushed(row_ids)
+        return results
+
+    def _set_outcome(self, row_id: str, outcome: Dict[str, Any]) -> None:
+        self._outcomes[row_id] = outcome
+        self._outcomes.move_to_end(row_id)
+        while len(self._outcomes) > MAX_OUTCOMES:
+            self._outcomes.popitem(last=False)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="sheet-write-queue", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _backoff(self, failures: int) -> None:
+        """
+        Espera antes de uma nova tentativa após ``failures`` flushes seguidos com falha.
+
+        A espera não é interrompida pela chegada de novas linhas (nem com o lote
+        cheio), apenas pelo encerramento da fila. Chamado com ``_cond`` adquirido.
+        """
+        delay = min(self.max_backoff, self.backoff_base * 2 ** min(failures - 1, 30))
+        # Jitter: processos que falharam juntos não voltam todos ao mesmo tempo
+        delay *= random.uniform(0.5, 1.0)
+        self.stats["backoff_seconds"] += delay
+        resume_at = time.monotonic() + delay
+        while not self._closed:
+            remaining = resume_at - time.monotonic()
+            if remaining <= 0:
+                break
+            self._cond.wait(timeout=remaining)
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            with self._cond:
+                if failures:
+                    self._backoff(failures)
+                if not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                if len(self._pending) < self.max_batch:
+                    # Janela para agrupar outras linhas no mesmo lote
+                    self._cond.wait(timeout=self.flush_interval)
+                if self._closed:
+                    return
+            results = self.flush()
+            if any(result["status"] != "written" for result in results.values()):
+                failures += 1
+            else:
+                failures = 0